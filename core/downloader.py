@@ -3,15 +3,31 @@
 """
 
 import logging
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
-from typing import Set, List, Tuple
+from typing import Dict, Set, List, Tuple
 from urllib.parse import urlparse
 
 from .utils import resolve_url, get_safe_filename, sanitize_filename
 
 logger = logging.getLogger(__name__)
 
+# Максимум одновременных соединений с одним хостом
+MAX_PER_HOST = 8
+
+# Префиксы Content-Type, которые сохраняем как текст
+TEXT_CONTENT_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/x-javascript',
+    'application/json',
+    'application/xml'
+)
+
 
 class ResourceDownloader:
     """Класс для загрузки ресурсов с веб-сайтов."""
@@ -30,9 +46,61 @@ class ResourceDownloader:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+
+        # Увеличиваем пул keep-alive соединений и добавляем повторы:
+        # переиспользование соединения экономит TLS handshake на каждый ресурс
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.downloaded_urls: Set[str] = set()
         self.failed_urls: List[Tuple[str, str]] = []
+        self.url_to_path: Dict[str, Path] = {}
+
+        # Уже созданные директории - чтобы не дергать mkdir на каждый файл
+        self._mkdir_cache: Set[Path] = set()
+
+        # Пул потоков для параллельной загрузки (загрузки ограничены сетью, не CPU)
+        self.executor = ThreadPoolExecutor(max_workers=16)
+        self._lock = threading.Lock()
+
+        # Ограничители одновременных соединений по хостам
+        self._host_limits = {}
     
+    def mark_dirs_created(self, dirs: List[Path]):
+        """
+        Отмечает директории как уже созданные.
+
+        Args:
+            dirs: Список существующих директорий
+        """
+        self._mkdir_cache.update(dirs)
+
+    def _host_limit(self, url: str) -> threading.Semaphore:
+        """
+        Возвращает семафор, ограничивающий число запросов к хосту URL.
+
+        Args:
+            url: URL запроса
+
+        Returns:
+            Семафор хоста
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            sem = self._host_limits.get(host)
+            if sem is None:
+                sem = threading.Semaphore(MAX_PER_HOST)
+                self._host_limits[host] = sem
+        return sem
+
     def download_file(self, url: str, file_path: Path) -> bool:
         """
         Скачивает файл по URL.
@@ -47,69 +115,138 @@ class ResourceDownloader:
         # Пропускаем если уже скачали
         if url in self.downloaded_urls:
             return True
-        
+
         try:
-            # Создаем директорию если нужно
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Скачиваем файл
-            response = self.session.get(url, timeout=30, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Определяем тип контента
-            content_type = response.headers.get('Content-Type', '').lower()
-            
-            # Сохраняем файл
-            if any(t in content_type for t in ['text', 'html', 'css', 'javascript', 'json']):
-                with open(file_path, 'w', encoding='utf-8', errors='ignore') as f:
-                    f.write(response.text)
-            else:
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
+            # Создаем директорию если нужно (пропуская уже созданные)
+            parent = file_path.parent
+            if parent not in self._mkdir_cache:
+                parent.mkdir(parents=True, exist_ok=True)
+                with self._lock:
+                    self._mkdir_cache.add(parent)
+
+            # Скачиваем файл (не больше MAX_PER_HOST запросов к хосту одновременно)
+            with self._host_limit(url):
+                with self.session.get(url, timeout=30, allow_redirects=True,
+                                      stream=True) as response:
+                    response.raise_for_status()
+
+                    # Определяем тип контента
+                    content_type = response.headers.get('Content-Type', '').lower()
+
+                    # Сохраняем файл
+                    if content_type.startswith(TEXT_CONTENT_TYPES):
+                        # Пишем байты как есть: response.text запускает
+                        # медленное определение кодировки и двойную перекодировку.
+                        # Перекодируем только если сервер объявил не-UTF-8 charset.
+                        data = response.content
+                        charset = ''
+                        if 'charset=' in content_type:
+                            charset = content_type.split('charset=')[-1].split(';')[0].strip()
+                        if charset and charset not in ('utf-8', 'utf8', 'ascii'):
+                            data = data.decode(charset, errors='replace').encode('utf-8')
+
+                        with open(file_path, 'wb') as f:
+                            f.write(data)
+                    else:
+                        # Бинарные файлы пишем потоково, не буферизуя тело в памяти
+                        with open(file_path, 'wb', buffering=1 << 20) as f:
+                            for chunk in response.iter_content(chunk_size=64 * 1024):
+                                f.write(chunk)
             
-            self.downloaded_urls.add(url)
+            with self._lock:
+                self.downloaded_urls.add(url)
             logger.info(f"  ✓ Скачан: {url} -> {file_path.name}")
             return True
-            
+
         except requests.exceptions.RequestException as e:
-            self.failed_urls.append((url, str(e)))
+            with self._lock:
+                self.failed_urls.append((url, str(e)))
             logger.warning(f"  ✗ Ошибка скачивания {url}: {e}")
             return False
         except Exception as e:
-            self.failed_urls.append((url, str(e)))
+            with self._lock:
+                self.failed_urls.append((url, str(e)))
             logger.error(f"  ✗ Неожиданная ошибка при скачивании {url}: {e}")
             return False
     
-    def download_resource(self, url: str, output_dir: Path, 
-                         subfolder: str = '', filename: str = None) -> Path:
+    def resource_path(self, url: str, output_dir: Path,
+                      subfolder: str = '', filename: str = None) -> Path:
         """
-        Скачивает ресурс и возвращает путь к файлу.
-        
+        Определяет путь сохранения ресурса без загрузки.
+
         Args:
             url: URL ресурса
             output_dir: Директория для сохранения
             subfolder: Подпапка (css, js, images и т.д.)
             filename: Имя файла (если не указано, берется из URL)
-            
+
         Returns:
-            Путь к скачанному файлу
+            Путь к файлу
         """
+        # Один и тот же URL всегда отображается в один путь
+        cached = self.url_to_path.get(url)
+        if cached is not None:
+            return cached
+
         # Определяем имя файла
         if not filename:
             parsed = urlparse(url)
             filename = get_safe_filename(parsed.path)
             filename = sanitize_filename(filename)
-        
+
         # Формируем путь
         if subfolder:
             file_path = output_dir / subfolder / filename
         else:
             file_path = output_dir / filename
-        
+
+        self.url_to_path[url] = file_path
+        return file_path
+
+    def download_resource(self, url: str, output_dir: Path,
+                         subfolder: str = '', filename: str = None) -> Path:
+        """
+        Скачивает ресурс и возвращает путь к файлу.
+
+        Args:
+            url: URL ресурса
+            output_dir: Директория для сохранения
+            subfolder: Подпапка (css, js, images и т.д.)
+            filename: Имя файла (если не указано, берется из URL)
+
+        Returns:
+            Путь к скачанному файлу
+        """
+        file_path = self.resource_path(url, output_dir, subfolder, filename)
+
         # Скачиваем файл
         self.download_file(url, file_path)
-        
+
         return file_path
+
+    def download_many(self, jobs: List[Tuple[str, Path]]) -> List[bool]:
+        """
+        Параллельно скачивает несколько файлов через пул потоков.
+
+        Args:
+            jobs: Список кортежей (URL, путь для сохранения)
+
+        Returns:
+            Список результатов в том же порядке
+        """
+        if not jobs:
+            return []
+
+        # Убираем повторы до постановки в очередь: один URL - одна загрузка
+        unique_jobs = []
+        seen: Set[str] = set()
+        for url, file_path in jobs:
+            if url in seen or url in self.downloaded_urls:
+                continue
+            seen.add(url)
+            unique_jobs.append((url, file_path))
+
+        return list(self.executor.map(lambda job: self.download_file(*job), unique_jobs))
     
     def get_failed_urls(self) -> List[Tuple[str, str]]:
         """
@@ -123,9 +260,19 @@ class ResourceDownloader:
     def get_downloaded_count(self) -> int:
         """
         Возвращает количество успешно скачанных файлов.
-        
+
         Returns:
             Количество файлов
         """
         return len(self.downloaded_urls)
 
+    def close(self):
+        """
+        Останавливает пул потоков и закрывает сессию.
+
+        При пакетном клонировании каждый загрузчик держит до 16 потоков
+        и пул соединений; без явного закрытия они живут до конца процесса.
+        """
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
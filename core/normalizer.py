@@ -3,29 +3,33 @@
 Выносит inline CSS/JS в отдельные файлы и сортирует ресурсы.
 """
 
-import re
+import io
+import os
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Union
 from bs4 import BeautifulSoup
 
-from .parser import HTMLParser
+from .parser import HTMLParser, _CSS_URL_RE
 from .downloader import ResourceDownloader
 from .utils import get_file_extension, sanitize_filename, is_same_domain
 
 logger = logging.getLogger(__name__)
 
+# Какой атрибут с URL переписывать у какого тега
+_REWRITE_ATTRS = {'link': 'href', 'script': 'src', 'img': 'src'}
+
 
 class StructureNormalizer:
     """Класс для нормализации структуры проекта."""
     
-    def __init__(self, html_content: str, base_url: str, domain: str, 
+    def __init__(self, html_content: Union[str, bytes], base_url: str, domain: str,
                  output_dir: Path, downloader: ResourceDownloader):
         """
         Инициализация нормализатора.
-        
+
         Args:
-            html_content: HTML содержимое
+            html_content: HTML содержимое (строка или байты)
             base_url: Базовый URL страницы
             domain: Домен сайта
             output_dir: Директория для сохранения
@@ -43,6 +47,12 @@ class StructureNormalizer:
         self.images_dir = output_dir / 'images'
         self.fonts_dir = output_dir / 'fonts'
         self.assets_dir = output_dir / 'assets'
+
+        # create_project_structure уже создала канонические папки
+        self.downloader.mark_dirs_created([
+            output_dir, self.css_dir, self.js_dir,
+            self.images_dir, self.fonts_dir, self.assets_dir
+        ])
     
     def normalize(self) -> str:
         """
@@ -81,26 +91,33 @@ class StructureNormalizer:
     def _process_external_css(self):
         """Обрабатывает внешние CSS файлы."""
         css_files = self.parser.extract_external_css()
-        
+
+        # Собираем задания на загрузку
+        jobs = []
         for idx, css_info in enumerate(css_files):
             url = css_info['url']
             tag = css_info['tag']
-            
+
             # Определяем имя файла
             filename = f"main_{idx + 1}.css"
             if 'href' in tag.attrs:
                 href = tag['href']
                 if '.' in href.split('/')[-1]:
                     filename = sanitize_filename(href.split('/')[-1])
-            
-            # Скачиваем CSS файл
-            file_path = self.downloader.download_resource(
+
+            file_path = self.downloader.resource_path(
                 url, self.output_dir, 'css', filename
             )
-            
-            # Обновляем ссылку в HTML (относительный путь)
-            relative_path = file_path.relative_to(self.output_dir)
-            tag['href'] = str(relative_path).replace('\\', '/')
+            # Файл всегда лежит в css/, относительный путь известен сразу
+            css_info['rel'] = f"css/{file_path.name}"
+            jobs.append((url, file_path))
+
+        # Скачиваем все CSS файлы параллельно
+        self.downloader.download_many(jobs)
+
+        # Обновляем ссылки в HTML (относительные пути)
+        for css_info in css_files:
+            css_info['tag']['href'] = css_info['rel']
     
     def _extract_inline_css(self):
         """Выносит inline CSS в отдельный файл."""
@@ -109,16 +126,17 @@ class StructureNormalizer:
         if not inline_styles:
             return
         
-        # Объединяем все inline стили
-        combined_css = []
+        # Объединяем все inline стили в один буфер
+        buf = io.StringIO()
         for style_info in inline_styles:
-            css_content = style_info['content']
-            combined_css.append(f"/* Inline style block */\n{css_content}\n")
-        
-        # Сохраняем в файл
+            buf.write("/* Inline style block */\n")
+            buf.write(style_info['content'])
+            buf.write("\n\n\n")
+
+        # Сохраняем в файл одной записью
         inline_css_path = self.css_dir / 'inline.css'
-        with open(inline_css_path, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(combined_css))
+        with open(inline_css_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write(buf.getvalue())
         
         logger.info(f"Создан файл: css/inline.css ({len(inline_styles)} блоков)")
         
@@ -136,26 +154,33 @@ class StructureNormalizer:
     def _process_external_js(self):
         """Обрабатывает внешние JS файлы."""
         js_files = self.parser.extract_external_js()
-        
+
+        # Собираем задания на загрузку
+        jobs = []
         for idx, js_info in enumerate(js_files):
             url = js_info['url']
             tag = js_info['tag']
-            
+
             # Определяем имя файла
             filename = f"main_{idx + 1}.js"
             if 'src' in tag.attrs:
                 src = tag['src']
                 if '.' in src.split('/')[-1]:
                     filename = sanitize_filename(src.split('/')[-1])
-            
-            # Скачиваем JS файл
-            file_path = self.downloader.download_resource(
+
+            file_path = self.downloader.resource_path(
                 url, self.output_dir, 'js', filename
             )
-            
-            # Обновляем ссылку в HTML (относительный путь)
-            relative_path = file_path.relative_to(self.output_dir)
-            tag['src'] = str(relative_path).replace('\\', '/')
+            # Файл всегда лежит в js/, относительный путь известен сразу
+            js_info['rel'] = f"js/{file_path.name}"
+            jobs.append((url, file_path))
+
+        # Скачиваем все JS файлы параллельно
+        self.downloader.download_many(jobs)
+
+        # Обновляем ссылки в HTML (относительные пути)
+        for js_info in js_files:
+            js_info['tag']['src'] = js_info['rel']
     
     def _extract_inline_js(self):
         """Выносит inline JS в отдельный файл."""
@@ -164,16 +189,17 @@ class StructureNormalizer:
         if not inline_scripts:
             return
         
-        # Объединяем все inline скрипты
-        combined_js = []
+        # Объединяем все inline скрипты в один буфер
+        buf = io.StringIO()
         for script_info in inline_scripts:
-            js_content = script_info['content']
-            combined_js.append(f"/* Inline script block */\n{js_content}\n")
-        
-        # Сохраняем в файл
+            buf.write("/* Inline script block */\n")
+            buf.write(script_info['content'])
+            buf.write("\n\n\n")
+
+        # Сохраняем в файл одной записью
         inline_js_path = self.js_dir / 'inline.js'
-        with open(inline_js_path, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(combined_js))
+        with open(inline_js_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write(buf.getvalue())
         
         logger.info(f"Создан файл: js/inline.js ({len(inline_scripts)} блоков)")
         
@@ -195,88 +221,107 @@ class StructureNormalizer:
     def _process_images(self):
         """Обрабатывает изображения."""
         images = self.parser.extract_images()
-        
+
+        # Собираем задания на загрузку
+        jobs = []
         for idx, img_info in enumerate(images):
             url = img_info['url']
             tag = img_info['tag']
-            
+
             # Определяем расширение
             ext = get_file_extension(url)
             if not ext:
                 ext = 'jpg'  # По умолчанию
-            
+
             # Определяем имя файла
             filename = f"image_{idx + 1}.{ext}"
             if 'src' in tag.attrs:
                 src = tag['src']
                 if '.' in src.split('/')[-1]:
                     filename = sanitize_filename(src.split('/')[-1])
-            
-            # Скачиваем изображение
-            file_path = self.downloader.download_resource(
+
+            file_path = self.downloader.resource_path(
                 url, self.output_dir, 'images', filename
             )
-            
-            # Обновляем ссылку в HTML (относительный путь)
+            # Файл всегда лежит в images/, относительный путь известен сразу
+            img_info['rel'] = f"images/{file_path.name}"
+            jobs.append((url, file_path))
+
+        # Скачиваем все изображения параллельно
+        self.downloader.download_many(jobs)
+
+        # Соответствие URL изображения -> локальный путь
+        img_map = {info['url']: info['rel'] for info in images}
+
+        # Обновляем ссылки в HTML (относительные пути)
+        for img_info in images:
+            tag = img_info['tag']
+
             if tag.name == 'img':
-                relative_path = file_path.relative_to(self.output_dir)
-                tag['src'] = str(relative_path).replace('\\', '/')
+                tag['src'] = img_info['rel']
             elif 'style' in tag.attrs:
-                # Обновляем в inline стилях
-                relative_path = file_path.relative_to(self.output_dir)
-                local_path = str(relative_path).replace('\\', '/')
-                style = tag['style']
-                style = re.sub(
-                    rf'url\(["\']?{re.escape(url)}["\']?\)',
-                    f'url({local_path})',
-                    style
+                # Все url() за один проход вместо регулярки на каждый URL
+                tag['style'] = _CSS_URL_RE.sub(
+                    lambda m: f"url({img_map[m.group(1)]})"
+                    if m.group(1) in img_map else m.group(0),
+                    tag['style']
                 )
-                tag['style'] = style
     
     def _process_fonts(self):
         """Обрабатывает шрифты из CSS файлов."""
-        # Получаем все CSS файлы
-        css_files = list(self.css_dir.glob('*.css'))
-        
-        fonts_found = []
-        
+        # Получаем все CSS файлы (os.scandir дешевле, чем glob с fnmatch)
+        with os.scandir(self.css_dir) as entries:
+            css_files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and entry.name.endswith('.css')
+            ]
+
+        # Соответствие URL шрифта -> локальный путь (общее для всех CSS)
+        font_map = {}
+
         for css_file in css_files:
             try:
                 with open(css_file, 'r', encoding='utf-8') as f:
                     css_content = f.read()
-                
-                # Извлекаем шрифты
-                font_urls = self.parser.extract_fonts_from_css(css_content)
-                
+
+                # Извлекаем шрифты (dict.fromkeys убирает повторы за O(N))
+                font_urls = list(dict.fromkeys(
+                    self.parser.extract_fonts_from_css(css_content)
+                ))
+
+                # Собираем задания на загрузку
+                jobs = []
                 for font_url in font_urls:
-                    if font_url not in fonts_found:
-                        fonts_found.append(font_url)
-                        
+                    if font_url not in font_map:
                         # Определяем имя файла
                         ext = get_file_extension(font_url)
-                        filename = f"font_{len(fonts_found)}.{ext}" if ext else "font.woff"
-                        
-                        # Скачиваем шрифт
-                        file_path = self.downloader.download_resource(
+                        filename = f"font_{len(font_map) + 1}.{ext}" if ext else "font.woff"
+
+                        file_path = self.downloader.resource_path(
                             font_url, self.output_dir, 'fonts', filename
                         )
-                        
-                        # Обновляем путь в CSS
-                        css_content = css_content.replace(
-                            font_url,
-                            f"../fonts/{file_path.name}"
-                        )
-                
-                # Сохраняем обновленный CSS
+                        font_map[font_url] = f"../fonts/{file_path.name}"
+                        jobs.append((font_url, file_path))
+
+                # Скачиваем все шрифты параллельно
+                self.downloader.download_many(jobs)
+
+                # Переписываем все url() за один проход вместо replace на каждый шрифт
                 if font_urls:
+                    css_content = _CSS_URL_RE.sub(
+                        lambda m: f"url({font_map[m.group(1)]})"
+                        if m.group(1) in font_map else m.group(0),
+                        css_content
+                    )
+
                     with open(css_file, 'w', encoding='utf-8') as f:
                         f.write(css_content)
-                        
+
             except Exception as e:
                 logger.warning(f"Ошибка обработки CSS файла {css_file}: {e}")
-        
-        if fonts_found:
-            logger.info(f"Обработано шрифтов: {len(fonts_found)}")
+
+        if font_map:
+            logger.info(f"Обработано шрифтов: {len(font_map)}")
     
     def _rewrite_paths(self) -> str:
         """
@@ -286,29 +331,27 @@ class StructureNormalizer:
             HTML с переписанными путями
         """
         soup = self.parser.get_soup()
-        
-        # Переписываем ссылки на CSS
-        for link in soup.find_all('link', rel='stylesheet', href=True):
-            href = link['href']
-            if href.startswith('http'):
-                # Если это внешняя ссылка, оставляем как есть или удаляем
-                if not is_same_domain(href, self.domain):
-                    link.decompose()
-        
-        # Переписываем ссылки на JS
-        for script in soup.find_all('script', src=True):
-            src = script['src']
-            if src.startswith('http'):
-                if not is_same_domain(src, self.domain):
-                    script.decompose()
-        
-        # Переписываем ссылки на изображения
-        for img in soup.find_all('img', src=True):
-            src = img['src']
-            if src.startswith('http'):
-                if not is_same_domain(src, self.domain):
-                    # Заменяем на placeholder или удаляем
-                    img['src'] = 'images/placeholder.png'
-        
-        return str(soup)
+
+        # Один обход вместо трех: атрибут выбирается по имени тега
+        for tag in soup.find_all(['link', 'script', 'img']):
+            # Среди link обрабатываем только таблицы стилей
+            if tag.name == 'link' and 'stylesheet' not in tag.get('rel', []):
+                continue
+
+            url = tag.get(_REWRITE_ATTRS[tag.name])
+            if not url or not url.startswith('http'):
+                continue
+
+            if is_same_domain(url, self.domain):
+                continue
+
+            if tag.name == 'img':
+                # Заменяем на placeholder или удаляем
+                tag['src'] = 'images/placeholder.png'
+            else:
+                # Внешние CSS/JS удаляем
+                tag.decompose()
+
+        # Единственная сериализация дерева за весь пайплайн
+        return self.parser.get_html()
 
@@ -4,154 +4,202 @@
 
 import re
 import logging
-from typing import List, Dict, Tuple
-from bs4 import BeautifulSoup, Tag
+from typing import List, Dict, Tuple, Union
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from urllib.parse import urlparse
 
 from .utils import resolve_url, is_same_domain
 
 logger = logging.getLogger(__name__)
 
+# Скомпилированные один раз паттерны для горячих циклов
+_CSS_URL_RE = re.compile(r'url\(["\']?([^"\')]+)["\']?\)')
+_FONT_FACE_RE = re.compile(
+    r'@font-face\s*\{[^}]*url\(["\']?([^"\')]+)["\']?\)[^}]*\}',
+    re.IGNORECASE | re.DOTALL
+)
+_FONT_EXT_RE = re.compile(
+    r'url\(["\']?([^"\')]+\.(woff|woff2|ttf|otf|eot))["\']?\)',
+    re.IGNORECASE
+)
+
+# Парсим только теги ресурсов, когда полное дерево не нужно
+_EXTRACT_STRAINER = SoupStrainer(['link', 'style', 'script', 'img'])
+
 
 class HTMLParser:
     """Класс для парсинга HTML и извлечения ресурсов."""
     
-    def __init__(self, html_content: str, base_url: str, domain: str):
+    def __init__(self, html_content: Union[str, bytes], base_url: str, domain: str,
+                 extract_only: bool = False):
         """
         Инициализация парсера.
-        
+
         Args:
-            html_content: HTML содержимое
+            html_content: HTML содержимое (строка или байты; для байтов
+                кодировку определяет lxml)
             base_url: Базовый URL страницы
             domain: Домен сайта
+            extract_only: Парсить только теги ресурсов. Быстрее и
+                экономнее по памяти, но дерево не годится для
+                переписывания ссылок, а background-image в атрибутах
+                style обычных тегов не извлекаются
         """
-        self.html_content = html_content
         self.base_url = base_url
         self.domain = domain
-        self.soup = BeautifulSoup(html_content, 'html.parser')
-    
+        # lxml - C-парсер, в разы быстрее чистопайтонового html.parser
+        # Исходную строку не храним: после парсинга нужен только soup
+        if extract_only:
+            self.soup = BeautifulSoup(html_content, 'lxml',
+                                      parse_only=_EXTRACT_STRAINER)
+        else:
+            self.soup = BeautifulSoup(html_content, 'lxml')
+        self._extracted: Dict[str, List[Dict]] = None
+
+    def extract_all(self) -> Dict[str, List[Dict]]:
+        """
+        Извлекает все ресурсы за один обход дерева.
+
+        Каждый вызов find_all - полный обход DOM; вместо 6+ обходов
+        раскладываем ресурсы по корзинам за один проход. Результат
+        кешируется.
+
+        Returns:
+            Словарь с корзинами css_external, css_inline,
+            js_external, js_inline, images
+        """
+        if self._extracted is not None:
+            return self._extracted
+
+        resources = {
+            'css_external': [],
+            'css_inline': [],
+            'js_external': [],
+            'js_inline': [],
+            'images': []
+        }
+
+        for tag in self.soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+
+            name = tag.name
+
+            if name == 'link':
+                if 'stylesheet' in tag.get('rel', []) and tag.get('href'):
+                    url = resolve_url(tag['href'], self.base_url)
+                    if is_same_domain(url, self.domain):
+                        resources['css_external'].append({
+                            'url': url,
+                            'tag': tag,
+                            'type': 'external'
+                        })
+
+            elif name == 'style':
+                if tag.string:
+                    css_content = tag.string.strip()
+                    if css_content:
+                        resources['css_inline'].append({
+                            'content': css_content,
+                            'tag': tag,
+                            'type': 'inline'
+                        })
+
+            elif name == 'script':
+                src = tag.get('src')
+                if src:
+                    url = resolve_url(src, self.base_url)
+                    if is_same_domain(url, self.domain):
+                        resources['js_external'].append({
+                            'url': url,
+                            'tag': tag,
+                            'type': 'external'
+                        })
+                elif tag.string:
+                    js_content = tag.string.strip()
+                    if js_content and not js_content.startswith('<!--'):
+                        resources['js_inline'].append({
+                            'content': js_content,
+                            'tag': tag,
+                            'type': 'inline'
+                        })
+
+            elif name == 'img':
+                src = tag.get('src')
+                if src:
+                    url = resolve_url(src, self.base_url)
+                    if is_same_domain(url, self.domain):
+                        resources['images'].append({
+                            'url': url,
+                            'tag': tag,
+                            'type': 'image'
+                        })
+
+            # CSS background-image в атрибуте style у любого тега
+            style_content = tag.get('style')
+            if style_content:
+                for url in _CSS_URL_RE.findall(style_content):
+                    abs_url = resolve_url(url, self.base_url)
+                    if is_same_domain(abs_url, self.domain):
+                        resources['images'].append({
+                            'url': abs_url,
+                            'tag': tag,
+                            'type': 'image'
+                        })
+
+        logger.info(f"Найдено внешних CSS файлов: {len(resources['css_external'])}")
+        logger.info(f"Найдено inline CSS блоков: {len(resources['css_inline'])}")
+        logger.info(f"Найдено внешних JS файлов: {len(resources['js_external'])}")
+        logger.info(f"Найдено inline JS блоков: {len(resources['js_inline'])}")
+        logger.info(f"Найдено изображений: {len(resources['images'])}")
+
+        self._extracted = resources
+        return resources
+
     def extract_external_css(self) -> List[Dict[str, str]]:
         """
         Извлекает ссылки на внешние CSS файлы.
-        
+
         Returns:
             Список словарей с информацией о CSS файлах
         """
-        css_files = []
-        
-        for link in self.soup.find_all('link', rel='stylesheet', href=True):
-            url = resolve_url(link['href'], self.base_url)
-            
-            if is_same_domain(url, self.domain):
-                css_files.append({
-                    'url': url,
-                    'tag': link,
-                    'type': 'external'
-                })
-        
-        logger.info(f"Найдено внешних CSS файлов: {len(css_files)}")
-        return css_files
-    
+        return self.extract_all()['css_external']
+
     def extract_inline_css(self) -> List[Dict[str, str]]:
         """
         Извлекает inline CSS из тегов <style>.
-        
+
         Returns:
             Список словарей с CSS кодом
         """
-        inline_styles = []
-        
-        for style_tag in self.soup.find_all('style'):
-            if style_tag.string:
-                css_content = style_tag.string.strip()
-                if css_content:
-                    inline_styles.append({
-                        'content': css_content,
-                        'tag': style_tag,
-                        'type': 'inline'
-                    })
-        
-        logger.info(f"Найдено inline CSS блоков: {len(inline_styles)}")
-        return inline_styles
-    
+        return self.extract_all()['css_inline']
+
     def extract_external_js(self) -> List[Dict[str, str]]:
         """
         Извлекает ссылки на внешние JS файлы.
-        
+
         Returns:
             Список словарей с информацией о JS файлах
         """
-        js_files = []
-        
-        for script in self.soup.find_all('script', src=True):
-            url = resolve_url(script['src'], self.base_url)
-            
-            if is_same_domain(url, self.domain):
-                js_files.append({
-                    'url': url,
-                    'tag': script,
-                    'type': 'external'
-                })
-        
-        logger.info(f"Найдено внешних JS файлов: {len(js_files)}")
-        return js_files
-    
+        return self.extract_all()['js_external']
+
     def extract_inline_js(self) -> List[Dict[str, str]]:
         """
         Извлекает inline JavaScript из тегов <script>.
-        
+
         Returns:
             Список словарей с JS кодом
         """
-        inline_scripts = []
-        
-        for script_tag in self.soup.find_all('script', src=False):
-            if script_tag.string:
-                js_content = script_tag.string.strip()
-                if js_content and not js_content.startswith('<!--'):
-                    inline_scripts.append({
-                        'content': js_content,
-                        'tag': script_tag,
-                        'type': 'inline'
-                    })
-        
-        logger.info(f"Найдено inline JS блоков: {len(inline_scripts)}")
-        return inline_scripts
-    
+        return self.extract_all()['js_inline']
+
     def extract_images(self) -> List[Dict[str, str]]:
         """
         Извлекает ссылки на изображения.
-        
+
         Returns:
             Список словарей с информацией об изображениях
         """
-        images = []
-        
-        for img in self.soup.find_all('img', src=True):
-            url = resolve_url(img['src'], self.base_url)
-            
-            if is_same_domain(url, self.domain):
-                images.append({
-                    'url': url,
-                    'tag': img,
-                    'type': 'image'
-                })
-        
-        # Также ищем в CSS background-image
-        for tag in self.soup.find_all(style=True):
-            style_content = tag.get('style', '')
-            urls = re.findall(r'url\(["\']?([^"\')]+)["\']?\)', style_content)
-            for url in urls:
-                abs_url = resolve_url(url, self.base_url)
-                if is_same_domain(abs_url, self.domain):
-                    images.append({
-                        'url': abs_url,
-                        'tag': tag,
-                        'type': 'image'
-                    })
-        
-        logger.info(f"Найдено изображений: {len(images)}")
-        return images
+        return self.extract_all()['images']
     
     def extract_fonts_from_css(self, css_content: str) -> List[str]:
         """
@@ -166,9 +214,8 @@ class HTMLParser:
         fonts = []
         
         # Ищем @font-face с url()
-        pattern = r'@font-face\s*\{[^}]*url\(["\']?([^"\')]+)["\']?\)[^}]*\}'
-        matches = re.finditer(pattern, css_content, re.IGNORECASE | re.DOTALL)
-        
+        matches = _FONT_FACE_RE.finditer(css_content)
+
         for match in matches:
             font_url = match.group(1)
             abs_url = resolve_url(font_url, self.base_url)
@@ -176,9 +223,8 @@ class HTMLParser:
                 fonts.append(abs_url)
         
         # Также ищем обычные url() в контексте font
-        pattern = r'url\(["\']?([^"\')]+\.(woff|woff2|ttf|otf|eot))["\']?\)'
-        matches = re.finditer(pattern, css_content, re.IGNORECASE)
-        
+        matches = _FONT_EXT_RE.finditer(css_content)
+
         for match in matches:
             font_url = match.group(1)
             abs_url = resolve_url(font_url, self.base_url)
@@ -199,7 +245,10 @@ class HTMLParser:
     def get_html(self) -> str:
         """
         Возвращает HTML как строку.
-        
+
+        Сериализация дерева - полный O(N) проход, вызывать только
+        на финальном шаге перед записью на диск.
+
         Returns:
             HTML содержимое
         """
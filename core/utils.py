@@ -3,21 +3,29 @@
 """
 
 import os
-import re
 import logging
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urlparse, urljoin, urlunparse
 
 logger = logging.getLogger(__name__)
 
+# Таблицы замен недопустимых символов: str.translate в разы быстрее re.sub
+_INVALID_PATH_TABLE = str.maketrans({c: '_' for c in '<>:"|?*'})
+_INVALID_FILENAME_TABLE = dict.fromkeys(range(32), '_')
+_INVALID_FILENAME_TABLE.update({ord(c): '_' for c in '<>:"|?*'})
 
+
+@lru_cache(maxsize=4096)
 def normalize_url(url: str) -> str:
     """
     Нормализует URL - добавляет протокол если отсутствует.
-    
+
+    Результат кешируется.
+
     Args:
         url: URL для нормализации
-        
+
     Returns:
         Нормализованный URL
     """
@@ -48,7 +56,7 @@ def get_safe_filename(url_path: str, default_name: str = 'index.html') -> str:
     path = path.split('?')[0].split('#')[0]
     
     # Заменяем недопустимые символы
-    path = re.sub(r'[<>:"|?*]', '_', path)
+    path = path.translate(_INVALID_PATH_TABLE)
     
     # Если путь заканчивается на /, добавляем index.html
     if path.endswith('/'):
@@ -61,42 +69,108 @@ def get_safe_filename(url_path: str, default_name: str = 'index.html') -> str:
     return path
 
 
+@lru_cache(maxsize=128)
+def _base_scheme(base_url: str) -> str:
+    """
+    Возвращает схему базового URL (с кешированием).
+
+    Args:
+        base_url: Базовый URL
+
+    Returns:
+        Схема URL (http, https)
+    """
+    return urlparse(base_url).scheme
+
+
+@lru_cache(maxsize=8192)
 def resolve_url(url: str, base_url: str) -> str:
     """
     Преобразует относительный URL в абсолютный.
-    
+
+    Результат кешируется: одни и те же URL встречаются
+    на странице десятки раз.
+
     Args:
         url: URL (может быть относительным)
         base_url: Базовый URL
-        
+
     Returns:
         Абсолютный URL
     """
     if url.startswith(('http://', 'https://')):
         return url
-    
+
     if url.startswith('//'):
-        return f"{urlparse(base_url).scheme}:{url}"
-    
+        return f"{_base_scheme(base_url)}:{url}"
+
     return urljoin(base_url, url)
 
 
+@lru_cache(maxsize=128)
+def _domain_prefixes(domain: str) -> tuple:
+    """
+    Возвращает префиксы абсолютных URL данного домена (с кешированием).
+
+    Args:
+        domain: Домен
+
+    Returns:
+        Кортеж префиксов
+    """
+    return ('https://' + domain, 'http://' + domain, '//' + domain)
+
+
+@lru_cache(maxsize=8192)
+def _url_netloc(url: str) -> str:
+    """
+    Возвращает netloc URL (с кешированием).
+
+    Args:
+        url: URL
+
+    Returns:
+        netloc или пустая строка
+    """
+    return urlparse(url).netloc
+
+
 def is_same_domain(url: str, domain: str) -> bool:
     """
     Проверяет, принадлежит ли URL тому же домену.
-    
+
+    Очевидные случаи (относительный путь, явный префикс домена)
+    распознаются без urlparse.
+
     Args:
         url: URL для проверки
         domain: Домен для сравнения
-        
+
     Returns:
         True если тот же домен
     """
+    if not url:
+        return False
+
+    # Относительный путь - заведомо тот же домен
+    if url[0] == '/' and not url.startswith('//'):
+        return True
+
+    # Явный префикс домена - тот же домен без парсинга
+    # (следующий символ проверяем, чтобы не принять e.com.evil.com за e.com)
+    for prefix in _domain_prefixes(domain):
+        if url.startswith(prefix):
+            rest = url[len(prefix):len(prefix) + 1]
+            if rest in ('', '/', '?', '#'):
+                return True
+
+    # Общий случай - через кешированный urlparse
+    # (urlparse бросает ValueError на битых URL вроде 'http://[::bad')
     try:
-        parsed = urlparse(url)
-        return parsed.netloc == domain or parsed.netloc == ''
-    except:
+        netloc = _url_netloc(url)
+    except ValueError:
         return False
+    return netloc == domain or netloc == ''
 
 
 def get_file_extension(url: str) -> str:
@@ -109,13 +183,7 @@ def get_file_extension(url: str) -> str:
     Returns:
         Расширение файла (без точки)
     """
-    parsed = urlparse(url)
-    path = parsed.path
-    
-    if '.' in path:
-        return path.split('.')[-1].lower()
-    
-    return ''
+    return os.path.splitext(urlparse(url).path)[1].lstrip('.').lower()
 
 
 def create_project_structure(output_dir: Path) -> dict:
@@ -156,7 +224,7 @@ def sanitize_filename(filename: str) -> str:
         Очищенное имя файла
     """
     # Удаляем недопустимые символы
-    filename = re.sub(r'[<>:"|?*\x00-\x1f]', '_', filename)
+    filename = filename.translate(_INVALID_FILENAME_TABLE)
     
     # Удаляем пробелы в начале и конце
     filename = filename.strip()
@@ -173,13 +241,16 @@ def sanitize_filename(filename: str) -> str:
     return filename
 
 
+@lru_cache(maxsize=4096)
 def get_project_name_from_url(url: str) -> str:
     """
     Извлекает имя проекта из URL.
-    
+
+    Результат кешируется.
+
     Args:
         url: URL сайта
-        
+
     Returns:
         Имя проекта (домен)
     """
@@ -1,262 +1,360 @@
-"""
-Главный модуль для нормализации и клонирования веб-сайтов.
-Точка входа приложения.
-"""
-
-import os
-import sys
-import logging
-import requests
-from pathlib import Path
-from datetime import datetime
-
-from core.utils import (
-    normalize_url, 
-    get_project_name_from_url, 
-    create_project_structure
-)
-from core.downloader import ResourceDownloader
-from core.parser import HTMLParser
-from core.normalizer import StructureNormalizer
-
-# Настройка логирования
-LOG_DIR = Path('logs')
-LOG_DIR.mkdir(exist_ok=True)
-
-log_file = LOG_DIR / f"cloner_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file, encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-logger = logging.getLogger(__name__)
-
-
-class WebsiteNormalizer:
-    """Главный класс для нормализации веб-сайтов."""
-    
-    def __init__(self, url: str, output_base_dir: Path = Path('output')):
-        """
-        Инициализация нормализатора.
-        
-        Args:
-            url: URL сайта для нормализации
-            output_base_dir: Базовая директория для сохранения проектов
-        """
-        self.url = normalize_url(url)
-        self.output_base_dir = output_base_dir
-        self.output_base_dir.mkdir(exist_ok=True)
-        
-        # Парсинг URL
-        from urllib.parse import urlparse
-        parsed = urlparse(self.url)
-        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
-        self.domain = parsed.netloc
-        
-        # Имя проекта
-        self.project_name = get_project_name_from_url(self.url)
-        self.project_dir = self.output_base_dir / self.project_name
-        
-        logger.info("=" * 60)
-        logger.info(f"НОРМАЛИЗАЦИЯ САЙТА: {self.url}")
-        logger.info(f"Домен: {self.domain}")
-        logger.info(f"Проект: {self.project_name}")
-        logger.info(f"Директория: {self.project_dir.absolute()}")
-        logger.info("=" * 60)
-    
-    def normalize(self) -> bool:
-        """
-        Основной метод нормализации.
-        
-        Returns:
-            True если успешно
-        """
-        try:
-            # 1. Загружаем HTML
-            logger.info("Шаг 1: Загрузка HTML страницы...")
-            html_content = self._download_html()
-            
-            if not html_content:
-                logger.error("Не удалось загрузить HTML страницу")
-                return False
-            
-            # 2. Создаем структуру проекта
-            logger.info("Шаг 2: Создание структуры проекта...")
-            dirs = create_project_structure(self.project_dir)
-            
-            # 3. Инициализируем загрузчик
-            logger.info("Шаг 3: Инициализация загрузчика ресурсов...")
-            downloader = ResourceDownloader(self.base_url, self.domain)
-            
-            # 4. Нормализуем структуру
-            logger.info("Шаг 4: Нормализация структуры...")
-            normalizer = StructureNormalizer(
-                html_content, 
-                self.base_url, 
-                self.domain,
-                self.project_dir,
-                downloader
-            )
-            
-            normalized_html = normalizer.normalize()
-            
-            # 5. Сохраняем нормализованный HTML
-            logger.info("Шаг 5: Сохранение нормализованного HTML...")
-            index_path = self.project_dir / 'index.html'
-            with open(index_path, 'w', encoding='utf-8') as f:
-                f.write(normalized_html)
-            
-            logger.info(f"✓ HTML сохранен: {index_path}")
-            
-            # 6. Выводим статистику
-            self._print_statistics(downloader)
-            
-            logger.info("=" * 60)
-            logger.info("НОРМАЛИЗАЦИЯ ЗАВЕРШЕНА УСПЕШНО!")
-            logger.info(f"Проект сохранен в: {self.project_dir.absolute()}")
-            logger.info("=" * 60)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Ошибка при нормализации: {e}", exc_info=True)
-            return False
-    
-    def _download_html(self) -> str:
-        """
-        Загружает HTML страницу.
-        
-        Returns:
-            HTML содержимое или пустая строка при ошибке
-        """
-        try:
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-            
-            response = session.get(self.url, timeout=30, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Определяем кодировку
-            if response.encoding:
-                html_content = response.text
-            else:
-                html_content = response.content.decode('utf-8', errors='ignore')
-            
-            logger.info(f"✓ HTML загружен ({len(html_content)} символов)")
-            
-            # Проверка на SPA
-            if self._is_spa(html_content):
-                logger.warning("⚠ Обнаружен SPA (Single Page Application)")
-                logger.warning("  Структура будет восстановлена визуально")
-            
-            return html_content
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Ошибка загрузки HTML: {e}")
-            return ""
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка: {e}")
-            return ""
-    
-    def _is_spa(self, html_content: str) -> bool:
-        """
-        Определяет, является ли сайт SPA.
-        
-        Args:
-            html_content: HTML содержимое
-            
-        Returns:
-            True если SPA
-        """
-        spa_indicators = [
-            'react',
-            'vue',
-            'angular',
-            'next.js',
-            'nuxt',
-            '__NEXT_DATA__',
-            'app-root',
-            'ng-app'
-        ]
-        
-        html_lower = html_content.lower()
-        
-        for indicator in spa_indicators:
-            if indicator in html_lower:
-                return True
-        
-        return False
-    
-    def _print_statistics(self, downloader: ResourceDownloader):
-        """
-        Выводит статистику по скачанным ресурсам.
-        
-        Args:
-            downloader: Объект загрузчика
-        """
-        logger.info("=" * 60)
-        logger.info("СТАТИСТИКА:")
-        logger.info(f"  Скачано файлов: {downloader.get_downloaded_count()}")
-        
-        failed = downloader.get_failed_urls()
-        if failed:
-            logger.warning(f"  Ошибок загрузки: {len(failed)}")
-            for url, error in failed[:5]:  # Показываем первые 5
-                logger.warning(f"    - {url}: {error}")
-        
-        # Подсчет файлов по типам
-        css_count = len(list(self.project_dir.glob('css/*.css')))
-        js_count = len(list(self.project_dir.glob('js/*.js')))
-        img_count = len(list(self.project_dir.glob('images/*')))
-        font_count = len(list(self.project_dir.glob('fonts/*')))
-        
-        logger.info(f"  CSS файлов: {css_count}")
-        logger.info(f"  JS файлов: {js_count}")
-        logger.info(f"  Изображений: {img_count}")
-        logger.info(f"  Шрифтов: {font_count}")
-        logger.info("=" * 60)
-
-
-def main():
-    """Главная функция."""
-    print("\n" + "=" * 60)
-    print("ВЕБ-НОРМАЛИЗАТОР")
-    print("Нормализация структуры веб-сайтов")
-    print("=" * 60 + "\n")
-    
-    # Получаем URL от пользователя
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
-    else:
-        url = input("Введите URL сайта: ").strip()
-    
-    if not url:
-        print("Ошибка: URL не указан")
-        sys.exit(1)
-    
-    # Создаем нормализатор
-    normalizer = WebsiteNormalizer(url)
-    
-    # Запускаем нормализацию
-    success = normalizer.normalize()
-    
-    if success:
-        print(f"\n✓ Проект успешно создан: {normalizer.project_dir}")
-        print(f"✓ Лог сохранен: {log_file}")
-        sys.exit(0)
-    else:
-        print("\n✗ Ошибка при нормализации сайта")
-        print(f"✓ Лог сохранен: {log_file}")
-        sys.exit(1)
-
-
-if __name__ == "__main__":
-    main()
-
+"""
+Главный модуль для нормализации и клонирования веб-сайтов.
+Точка входа приложения.
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import requests
+from pathlib import Path
+from urllib.parse import urlparse
+
+from core.utils import (
+    normalize_url, 
+    get_project_name_from_url, 
+    create_project_structure
+)
+from core.downloader import ResourceDownloader
+from core.parser import HTMLParser
+from core.normalizer import StructureNormalizer
+
+# Настройка логирования
+LOG_DIR = Path('logs')
+
+log_file = None
+
+logger = logging.getLogger(__name__)
+
+
+def _setup_logging():
+    """
+    Настраивает логирование в файл и на stdout.
+
+    Вызывается из main(): при импорте модуля как библиотеки
+    ни папка logs/, ни файловый хендлер не создаются.
+    """
+    global log_file
+
+    # Не переконфигурируем уже настроенное логирование
+    if logging.getLogger().handlers:
+        return
+
+    LOG_DIR.mkdir(exist_ok=True)
+
+    # time.strftime дешевле datetime.now().strftime: без объекта datetime
+    log_file = LOG_DIR / f"cloner_{time.strftime('%Y%m%d_%H%M%S')}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        # Явный datefmt - быстрый путь Formatter без миллисекунд
+        datefmt='%Y-%m-%d %H:%M:%S',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+# Признаки SPA: байтовые литералы собраны в кортеж на уровне модуля,
+# из них один раз строится общее регулярное выражение - один проход
+# по байтам вместо восьми последовательных поисков подстрок
+_SPA_INDICATORS = (
+    b'react',
+    b'vue',
+    b'angular',
+    b'next.js',
+    b'nuxt',
+    b'__NEXT_DATA__',
+    b'app-root',
+    b'ng-app'
+)
+
+_SPA_RE = re.compile(
+    b'|'.join(re.escape(p) for p in _SPA_INDICATORS),
+    re.IGNORECASE
+)
+
+# Маркеры SPA встречаются в <head> и начале <body>;
+# дальше этого окна документ не сканируем
+_SPA_SCAN_WINDOW = 256 * 1024
+
+# Разделитель для баннеров в логе
+_SEP = "=" * 60
+
+
+class WebsiteNormalizer:
+    """Главный класс для нормализации веб-сайтов."""
+
+    # Базовые директории, уже созданные в этом процессе:
+    # при пакетном клонировании mkdir не повторяется на каждый сайт
+    _ensured_dirs = set()
+
+    def __init__(self, url: str, output_base_dir: Path = Path('output')):
+        """
+        Инициализация нормализатора.
+
+        Args:
+            url: URL сайта для нормализации
+            output_base_dir: Базовая директория для сохранения проектов
+        """
+        self.url = normalize_url(url)
+        self.output_base_dir = output_base_dir
+
+        base_dir = self.output_base_dir.resolve()
+        if base_dir not in WebsiteNormalizer._ensured_dirs:
+            self.output_base_dir.mkdir(exist_ok=True)
+            WebsiteNormalizer._ensured_dirs.add(base_dir)
+        
+        # Парсинг URL (один раз; производные значения переиспользуются ниже)
+        self.parsed_url = urlparse(self.url)
+        self.base_url = f"{self.parsed_url.scheme}://{self.parsed_url.netloc}"
+        self.domain = self.parsed_url.netloc
+        
+        # Имя проекта
+        self.project_name = get_project_name_from_url(self.url)
+        self.project_dir = self.output_base_dir / self.project_name
+
+        # Абсолютный путь считаем один раз: absolute() дергает getcwd.
+        # Храним строкой - в LogRecord не попадает Path-объект
+        self._abs_project_dir = str(self.project_dir.resolve())
+
+
+        # Один LogRecord (и одна запись на хендлер) вместо шести
+        logger.info(
+            "%s\nНОРМАЛИЗАЦИЯ САЙТА: %s\nДомен: %s\nПроект: %s\nДиректория: %s\n%s",
+            _SEP, self.url, self.domain, self.project_name,
+            self._abs_project_dir, _SEP
+        )
+    
+    def normalize(self) -> bool:
+        """
+        Основной метод нормализации.
+        
+        Returns:
+            True если успешно
+        """
+        downloader = None
+        try:
+            # 1. Инициализируем загрузчик (его сессия используется и для HTML,
+            # и для ресурсов: одно TLS-рукопожатие, теплое keep-alive соединение)
+            logger.info("Шаг 1: Инициализация загрузчика ресурсов...")
+            downloader = ResourceDownloader(self.base_url, self.domain)
+
+            # 2-3. Загружаем HTML; пока ждем ответ сети, параллельно
+            # создаем структуру проекта в пуле загрузчика
+            logger.info("Шаг 2: Загрузка HTML страницы...")
+            logger.info("Шаг 3: Создание структуры проекта (параллельно)...")
+            dirs_future = downloader.executor.submit(
+                create_project_structure, self.project_dir
+            )
+            html_content = self._download_html(downloader.session)
+            dirs = dirs_future.result()
+
+            if not html_content:
+                logger.error("Не удалось загрузить HTML страницу")
+                return False
+
+            # 4. Нормализуем структуру
+            logger.info("Шаг 4: Нормализация структуры...")
+            normalizer = StructureNormalizer(
+                html_content, 
+                self.base_url, 
+                self.domain,
+                self.project_dir,
+                downloader
+            )
+            
+            normalized_html = normalizer.normalize()
+            
+            # 5. Сохраняем нормализованный HTML
+            logger.info("Шаг 5: Сохранение нормализованного HTML...")
+            # Кодируем один раз и пишем одним системным вызовом
+            # (буфер 1 МиБ вместо стандартных 8 КиБ)
+            index_path = self.project_dir / 'index.html'
+            with open(index_path, 'wb', buffering=1 << 20) as f:
+                f.write(normalized_html.encode('utf-8'))
+            
+            logger.info("✓ HTML сохранен: %s", index_path)
+            
+            # 6. Выводим статистику
+            self._print_statistics(downloader)
+            
+            logger.info(
+                "%s\nНОРМАЛИЗАЦИЯ ЗАВЕРШЕНА УСПЕШНО!\nПроект сохранен в: %s\n%s",
+                _SEP, self._abs_project_dir, _SEP
+            )
+            
+            return True
+            
+        except Exception as e:
+            logger.error("Ошибка при нормализации: %s", e, exc_info=True)
+            return False
+        finally:
+            # Освобождаем потоки и соединения: при пакетной обработке
+            # загрузчики иначе копятся до конца процесса
+            if downloader is not None:
+                downloader.close()
+    
+    def _download_html(self, session: requests.Session) -> bytes:
+        """
+        Загружает HTML страницу.
+
+        Тело возвращается сырыми байтами: декодирование в Python
+        не нужно, lxml сам определяет кодировку на C-уровне при парсинге.
+
+        Args:
+            session: Сессия с пулом соединений (от ResourceDownloader)
+
+        Returns:
+            HTML содержимое (байты) или пустые байты при ошибке
+        """
+        try:
+            # stream=True: заголовки приходят сразу, тело читаем только
+            # после проверки Content-Type
+            response = session.get(self.url, timeout=30, allow_redirects=True,
+                                   stream=True)
+            response.raise_for_status()
+
+            # Не-HTML (PDF, картинка и т.п.) не декодируем и не парсим
+            content_type = response.headers.get('Content-Type', '')
+            content_type = content_type.split(';', 1)[0].strip().lower()
+            if (content_type and not content_type.endswith('html')
+                    and content_type != 'application/xhtml+xml'):
+                logger.error("Не HTML содержимое: %s", content_type)
+                response.close()
+                return b""
+
+            html_bytes = response.content
+
+            logger.info("✓ HTML загружен (%d байт)", len(html_bytes))
+
+            # Проверка на SPA
+            if self._is_spa(html_bytes):
+                logger.warning("⚠ Обнаружен SPA (Single Page Application)")
+                logger.warning("  Структура будет восстановлена визуально")
+
+            return html_bytes
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Ошибка загрузки HTML: %s", e)
+            return b""
+        except Exception as e:
+            logger.error("Неожиданная ошибка: %s", e)
+            return b""
+
+    def _is_spa(self, html_bytes: bytes) -> bool:
+        """
+        Определяет, является ли сайт SPA.
+
+        Args:
+            html_bytes: HTML содержимое (байты)
+
+        Returns:
+            True если SPA
+        """
+        # Ограничиваемся <head> (или первыми 256 КБ): маркеры фреймворков
+        # всегда в начале документа, хвост многомегабайтной страницы
+        # сканировать незачем
+        head_end = html_bytes.find(b'</head>', 0, _SPA_SCAN_WINDOW)
+        window_end = head_end + 7 if head_end != -1 else _SPA_SCAN_WINDOW
+
+        return _SPA_RE.search(html_bytes, 0, window_end) is not None
+    
+    def _count_files(self, subdir: str, suffix: str = None) -> int:
+        """
+        Считает файлы в подпапке проекта через os.scandir.
+
+        Args:
+            subdir: Имя подпапки
+            suffix: Расширение для фильтрации (None - все файлы)
+
+        Returns:
+            Количество файлов
+        """
+        path = self.project_dir / subdir
+        if not path.exists():
+            return 0
+
+        with os.scandir(path) as entries:
+            return sum(
+                1 for entry in entries
+                if entry.is_file() and (suffix is None or entry.name.endswith(suffix))
+            )
+
+    def _print_statistics(self, downloader: ResourceDownloader):
+        """
+        Выводит статистику по скачанным ресурсам.
+        
+        Args:
+            downloader: Объект загрузчика
+        """
+        logger.info("=" * 60)
+        logger.info("СТАТИСТИКА:")
+        logger.info("  Скачано файлов: %d", downloader.get_downloaded_count())
+        
+        failed = downloader.get_failed_urls()
+        if failed:
+            logger.warning("  Ошибок загрузки: %d", len(failed))
+            for url, error in failed[:5]:  # Показываем первые 5
+                logger.warning("    - %s: %s", url, error)
+        
+        # Подсчет файлов по типам (scandir без промежуточных Path-объектов)
+        css_count = self._count_files('css', '.css')
+        js_count = self._count_files('js', '.js')
+        img_count = self._count_files('images')
+        font_count = self._count_files('fonts')
+        
+        logger.info("  CSS файлов: %d", css_count)
+        logger.info("  JS файлов: %d", js_count)
+        logger.info("  Изображений: %d", img_count)
+        logger.info("  Шрифтов: %d", font_count)
+        logger.info("=" * 60)
+
+
+def main():
+    """Главная функция."""
+    _setup_logging()
+
+    # Баннер одной записью вместо четырех print
+    sys.stdout.write(
+        "\n" + _SEP + "\n"
+        "ВЕБ-НОРМАЛИЗАТОР\n"
+        "Нормализация структуры веб-сайтов\n"
+        + _SEP + "\n\n"
+    )
+
+    # Получаем URL от пользователя
+    if len(sys.argv) > 1:
+        url = sys.argv[1]
+    elif sys.stdin.isatty() and not os.environ.get('CLONER_NONINTERACTIVE'):
+        url = input("Введите URL сайта: ").strip()
+    else:
+        # Пакетный режим (pipe/скрипт): без readline и приглашения
+        url = sys.stdin.readline().strip()
+    
+    if not url:
+        print("Ошибка: URL не указан")
+        sys.exit(1)
+    
+    # Создаем нормализатор
+    normalizer = WebsiteNormalizer(url)
+    
+    # Запускаем нормализацию
+    success = normalizer.normalize()
+    
+    if success:
+        print(f"\n✓ Проект успешно создан: {normalizer.project_dir}")
+        print(f"✓ Лог сохранен: {log_file}")
+        sys.exit(0)
+    else:
+        print("\n✗ Ошибка при нормализации сайта")
+        print(f"✓ Лог сохранен: {log_file}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
+
@@ -1,726 +1,1071 @@
-"""
-Веб-сервер для клонирования сайтов с отправкой через Telegram бота.
-
-Основные возможности:
-- Полное клонирование сайта (HTML, CSS, JS, изображения, шрифты)
-- Сохранение структуры папок
-- Переписывание ссылок для локального просмотра
-- Архивирование в ZIP
-- Отправка архива через Telegram бота
-- Подробное логирование
-"""
-
-import http.server
-import socketserver
-import os
-import re
-import logging
-import zipfile
-import shutil
-from urllib.parse import urlparse, urljoin, urlunparse, parse_qs
-from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
-import threading
-import json
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('cloner.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# Константы
-CLONED_SITES_DIR = 'cloned_sites'
-CONFIG_FILE = 'config.json'
-PORT = 5000
-
-# Загрузка конфигурации
-def load_config():
-    """Загружает конфигурацию из файла config.json"""
-    default_config = {
-        "telegram_bot_token": "",
-        "telegram_chat_id": ""
-    }
-    
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return {**default_config, **config}
-        except Exception as e:
-            logger.warning(f"Ошибка загрузки config.json: {e}. Используются значения по умолчанию.")
-    
-    return default_config
-
-CONFIG = load_config()
-
-
-class WebsiteCloner:
-    """Класс для клонирования веб-сайтов"""
-    
-    def __init__(self, url, output_dir):
-        """
-        Инициализация клонировщика
-        
-        Args:
-            url: URL сайта для клонирования
-            output_dir: Директория для сохранения файлов
-        """
-        self.url = self._normalize_url(url)
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Парсинг URL
-        parsed = urlparse(self.url)
-        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
-        self.domain = parsed.netloc
-        
-        # Сессия для запросов
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        
-        # Отслеживание скачанных ресурсов
-        self.downloaded_urls = set()
-        self.failed_urls = []
-        
-        logger.info(f"Инициализация клонирования: {self.url}")
-        logger.info(f"Директория сохранения: {self.output_dir.absolute()}")
-    
-    def _normalize_url(self, url):
-        """Нормализует URL (добавляет протокол если отсутствует)"""
-        url = url.strip()
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        return url.rstrip('/')
-    
-    def _get_safe_filename(self, url_path):
-        """
-        Создает безопасное имя файла из URL пути
-        
-        Args:
-            url_path: Путь из URL
-            
-        Returns:
-            Безопасное имя файла
-        """
-        # Удаляем начальный слэш
-        path = url_path.lstrip('/')
-        
-        # Если путь пустой, возвращаем index.html
-        if not path or path == '/':
-            return 'index.html'
-        
-        # Заменяем недопустимые символы
-        path = re.sub(r'[<>:"|?*]', '_', path)
-        
-        # Если путь заканчивается на /, добавляем index.html
-        if path.endswith('/'):
-            path += 'index.html'
-        
-        # Если нет расширения, добавляем .html
-        if '.' not in os.path.basename(path):
-            path += '.html'
-        
-        return path
-    
-    def _download_file(self, url, file_path):
-        """
-        Скачивает файл по URL
-        
-        Args:
-            url: URL файла
-            file_path: Путь для сохранения (может быть Path объектом или строкой)
-            
-        Returns:
-            True если успешно, False в противном случае
-        """
-        # Пропускаем если уже скачали
-        if url in self.downloaded_urls:
-            return True
-        
-        try:
-            # Преобразуем в Path если нужно
-            if isinstance(file_path, str):
-                file_path = Path(file_path)
-            
-            # Очищаем путь от недопустимых символов
-            parts = []
-            for part in file_path.parts:
-                # Заменяем недопустимые символы
-                clean_part = re.sub(r'[<>:"|?*]', '_', part)
-                parts.append(clean_part)
-            file_path = Path(*parts)
-            
-            # Создаем директорию если нужно
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Скачиваем файл
-            response = self.session.get(url, timeout=30, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Определяем тип контента
-            content_type = response.headers.get('Content-Type', '').lower()
-            
-            # Сохраняем файл
-            if 'text' in content_type or 'html' in content_type or 'css' in content_type or 'javascript' in content_type:
-                # Текстовые файлы сохраняем с правильной кодировкой
-                with open(file_path, 'w', encoding='utf-8', errors='ignore') as f:
-                    f.write(response.text)
-            else:
-                # Бинарные файлы
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-            
-            self.downloaded_urls.add(url)
-            logger.info(f"  ✓ Скачан: {url} -> {file_path.relative_to(self.output_dir)}")
-            return True
-            
-        except requests.exceptions.RequestException as e:
-            self.failed_urls.append((url, str(e)))
-            logger.warning(f"  ✗ Ошибка скачивания {url}: {e}")
-            return False
-        except Exception as e:
-            self.failed_urls.append((url, str(e)))
-            logger.error(f"  ✗ Неожиданная ошибка при скачивании {url}: {e}")
-            return False
-    
-    def _resolve_url(self, url, base_url=None):
-        """
-        Преобразует относительный URL в абсолютный
-        
-        Args:
-            url: URL (может быть относительным)
-            base_url: Базовый URL (по умолчанию self.base_url)
-            
-        Returns:
-            Абсолютный URL
-        """
-        if base_url is None:
-            base_url = self.base_url
-        
-        # Если URL уже абсолютный
-        if url.startswith(('http://', 'https://')):
-            return url
-        
-        # Если URL начинается с //
-        if url.startswith('//'):
-            return f"{urlparse(base_url).scheme}:{url}"
-        
-        # Объединяем с базовым URL
-        return urljoin(base_url, url)
-    
-    def _is_same_domain(self, url):
-        """Проверяет, принадлежит ли URL тому же домену"""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc == self.domain or parsed.netloc == ''
-        except:
-            return False
-    
-    def _should_download(self, url):
-        """
-        Определяет, нужно ли скачивать ресурс
-        
-        Args:
-            url: URL ресурса
-            
-        Returns:
-            True если нужно скачать, False в противном случае
-        """
-        # Пропускаем внешние домены (можно настроить)
-        if not self._is_same_domain(url):
-            return False
-        
-        # Пропускаем уже скачанные
-        if url in self.downloaded_urls:
-            return False
-        
-        # Пропускаем data: и javascript: URL
-        if url.startswith(('data:', 'javascript:', 'mailto:', 'tel:')):
-            return False
-        
-        return True
-    
-    def _rewrite_urls_in_html(self, html_content, base_url):
-        """
-        Переписывает URL в HTML для локального просмотра
-        
-        Args:
-            html_content: Содержимое HTML
-            base_url: Базовый URL страницы
-            
-        Returns:
-            HTML с переписанными URL
-        """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Теги с атрибутом href
-        for tag in soup.find_all(['a', 'link'], href=True):
-            original_url = tag['href']
-            if self._should_download(self._resolve_url(original_url, base_url)):
-                local_path = self._url_to_local_path(original_url, base_url)
-                tag['href'] = local_path
-        
-        # Теги с атрибутом src
-        for tag in soup.find_all(['img', 'script', 'iframe', 'source', 'audio', 'video'], src=True):
-            original_url = tag['src']
-            if self._should_download(self._resolve_url(original_url, base_url)):
-                local_path = self._url_to_local_path(original_url, base_url)
-                tag['src'] = local_path
-        
-        # CSS в style тегах
-        for tag in soup.find_all('style'):
-            if tag.string:
-                tag.string = self._rewrite_css_urls(tag.string, base_url)
-        
-        # Атрибут style
-        for tag in soup.find_all(style=True):
-            tag['style'] = self._rewrite_css_urls(tag['style'], base_url)
-        
-        return str(soup)
-    
-    def _rewrite_css_urls(self, css_content, base_url):
-        """
-        Переписывает URL в CSS
-        
-        Args:
-            css_content: Содержимое CSS
-            base_url: Базовый URL
-            
-        Returns:
-            CSS с переписанными URL
-        """
-        def replace_url(match):
-            url = match.group(1).strip('\'"')
-            absolute_url = self._resolve_url(url, base_url)
-            if self._should_download(absolute_url):
-                local_path = self._url_to_local_path(url, base_url)
-                return f"url({local_path})"
-            return match.group(0)
-        
-        # Паттерн для url() в CSS
-        pattern = r'url\(([^)]+)\)'
-        return re.sub(pattern, replace_url, css_content)
-    
-    def _url_to_local_path(self, url, base_url):
-        """
-        Преобразует URL в локальный путь относительно корня сайта
-        
-        Args:
-            url: URL (может быть относительным)
-            base_url: Базовый URL текущей страницы
-            
-        Returns:
-            Относительный путь для использования в HTML
-        """
-        absolute_url = self._resolve_url(url, base_url)
-        parsed = urlparse(absolute_url)
-        path = parsed.path
-        
-        # Если путь пустой, возвращаем index.html
-        if not path or path == '/':
-            return 'index.html'
-        
-        # Удаляем начальный слэш
-        path = path.lstrip('/')
-        
-        # Если нет расширения и это не директория, добавляем .html
-        if '.' not in os.path.basename(path) and not path.endswith('/'):
-            path += '.html'
-        
-        return path
-    
-    def clone(self):
-        """
-        Основной метод клонирования сайта
-        
-        Returns:
-            True если успешно, False в противном случае
-        """
-        try:
-            logger.info(f"Начало клонирования сайта: {self.url}")
-            
-            # Скачиваем главную страницу
-            logger.info("Скачивание главной страницы...")
-            response = self.session.get(self.url, timeout=30)
-            response.raise_for_status()
-            
-            # Определяем тип контента
-            content_type = response.headers.get('Content-Type', '').lower()
-            
-            if 'html' in content_type:
-                # Обрабатываем HTML
-                html_content = response.text
-                
-                # Переписываем URL
-                html_content = self._rewrite_urls_in_html(html_content, self.url)
-                
-                # Сохраняем главную страницу
-                index_path = self.output_dir / 'index.html'
-                with open(index_path, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-                logger.info(f"Главная страница сохранена: {index_path}")
-                
-                # Находим и скачиваем все ресурсы
-                self._download_resources(html_content, self.url)
-                
-            else:
-                # Если не HTML, просто сохраняем как есть
-                file_path = self.output_dir / 'index.html'
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                logger.info(f"Файл сохранен: {file_path}")
-            
-            # Скачиваем CSS файлы
-            self._download_css_files()
-            
-            # Скачиваем JS файлы
-            self._download_js_files()
-            
-            # Скачиваем изображения
-            self._download_images()
-            
-            # Скачиваем шрифты
-            self._download_fonts()
-            
-            logger.info(f"Клонирование завершено!")
-            logger.info(f"Скачано файлов: {len(self.downloaded_urls)}")
-            if self.failed_urls:
-                logger.warning(f"Не удалось скачать: {len(self.failed_urls)} файлов")
-            
-            return True
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Ошибка при клонировании сайта: {e}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-        except Exception as e:
-            error_msg = f"Неожиданная ошибка: {e}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-    
-    def _download_resources(self, html_content, base_url):
-        """Находит и скачивает все ресурсы из HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # CSS файлы
-        for link in soup.find_all('link', rel='stylesheet', href=True):
-            url = self._resolve_url(link['href'], base_url)
-            # Удаляем query параметры и фрагменты из URL
-            url = url.split('?')[0].split('#')[0]
-            if self._should_download(url):
-                parsed = urlparse(url)
-                file_path = self.output_dir / parsed.path.lstrip('/')
-                if not file_path.suffix:
-                    file_path = file_path.parent / (file_path.name + '.css')
-                elif file_path.suffix == '':
-                    file_path = file_path.parent / (file_path.name + '.css')
-                self._download_file(url, file_path)
-        
-        # JS файлы
-        for script in soup.find_all('script', src=True):
-            url = self._resolve_url(script['src'], base_url)
-            url = url.split('?')[0].split('#')[0]
-            if self._should_download(url):
-                parsed = urlparse(url)
-                file_path = self.output_dir / parsed.path.lstrip('/')
-                if not file_path.suffix:
-                    file_path = file_path.parent / (file_path.name + '.js')
-                elif file_path.suffix == '':
-                    file_path = file_path.parent / (file_path.name + '.js')
-                self._download_file(url, file_path)
-        
-        # Изображения
-        for img in soup.find_all('img', src=True):
-            url = self._resolve_url(img['src'], base_url)
-            url = url.split('?')[0].split('#')[0]
-            if self._should_download(url):
-                parsed = urlparse(url)
-                file_path = self.output_dir / parsed.path.lstrip('/')
-                self._download_file(url, file_path)
-        
-        # Другие ресурсы
-        for tag in soup.find_all(['source', 'audio', 'video'], src=True):
-            url = self._resolve_url(tag['src'], base_url)
-            url = url.split('?')[0].split('#')[0]
-            if self._should_download(url):
-                parsed = urlparse(url)
-                file_path = self.output_dir / parsed.path.lstrip('/')
-                self._download_file(url, file_path)
-    
-    def _download_css_files(self):
-        """Скачивает CSS файлы и обрабатывает встроенные URL"""
-        # Находим все CSS файлы в структуре
-        for css_file in self.output_dir.rglob('*.css'):
-            try:
-                # Определяем базовый URL для этого CSS файла
-                relative_path = css_file.relative_to(self.output_dir)
-                if relative_path.parent == Path('.'):
-                    css_dir_url = f"{self.base_url}/"
-                else:
-                    css_dir_url = f"{self.base_url}/{relative_path.parent.as_posix().replace(chr(92), '/')}/"
-                
-                with open(css_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    css_content = f.read()
-                
-                # Находим и скачиваем ресурсы из CSS перед переписыванием
-                pattern = r'url\(([^)]+)\)'
-                for match in re.finditer(pattern, css_content):
-                    url = match.group(1).strip('\'"')
-                    absolute_url = self._resolve_url(url, css_dir_url)
-                    # Удаляем query параметры
-                    absolute_url = absolute_url.split('?')[0].split('#')[0]
-                    if self._should_download(absolute_url):
-                        parsed = urlparse(absolute_url)
-                        # Сохраняем относительно директории CSS файла
-                        resource_relative = parsed.path.lstrip('/')
-                        if resource_relative:
-                            resource_path = css_file.parent / resource_relative
-                            self._download_file(absolute_url, resource_path)
-                
-                # Переписываем URL в CSS
-                css_content = self._rewrite_css_urls(css_content, css_dir_url)
-                
-                # Сохраняем обработанный CSS
-                with open(css_file, 'w', encoding='utf-8') as f:
-                    f.write(css_content)
-                    
-            except Exception as e:
-                logger.warning(f"Ошибка обработки CSS файла {css_file}: {e}")
-    
-    def _download_js_files(self):
-        """Скачивает JS файлы"""
-        js_dir = self.output_dir / 'js'
-        if not js_dir.exists():
-            return
-        
-        # JS файлы уже скачаны в _download_resources
-        pass
-    
-    def _download_images(self):
-        """Скачивает изображения"""
-        # Изображения уже скачаны в _download_resources
-        pass
-    
-    def _download_fonts(self):
-        """Скачивает шрифты из CSS"""
-        # Шрифты обрабатываются в _download_css_files
-        pass
-
-
-def create_zip_archive(source_dir, zip_path):
-    """
-    Создает ZIP архив из директории
-    
-    Args:
-        source_dir: Исходная директория
-        zip_path: Путь к ZIP файлу
-        
-    Returns:
-        Путь к созданному ZIP файлу
-    """
-    logger.info(f"Создание ZIP архива: {zip_path}")
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, source_dir)
-                zipf.write(file_path, arcname)
-                logger.debug(f"  Добавлен в архив: {arcname}")
-    
-    zip_size = os.path.getsize(zip_path) / (1024 * 1024)  # MB
-    logger.info(f"ZIP архив создан: {zip_path} ({zip_size:.2f} MB)")
-    
-    return zip_path
-
-
-def send_telegram_file(file_path, bot_token, chat_id):
-    """
-    Отправляет файл через Telegram бота
-    
-    Args:
-        file_path: Путь к файлу
-        bot_token: Токен Telegram бота
-        chat_id: ID чата для отправки
-        
-    Returns:
-        True если успешно, False в противном случае
-    """
-    if not bot_token or not chat_id:
-        logger.warning("Telegram бот не настроен. Пропуск отправки.")
-        return False
-    
-    try:
-        logger.info(f"Отправка файла через Telegram: {file_path}")
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
-        
-        with open(file_path, 'rb') as f:
-            files = {'document': f}
-            data = {'chat_id': chat_id}
-            response = requests.post(url, files=files, data=data, timeout=300)
-            response.raise_for_status()
-        
-        logger.info("Файл успешно отправлен через Telegram")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Ошибка отправки файла через Telegram: {e}")
-        return False
-
-
-class RequestHandler(http.server.SimpleHTTPRequestHandler):
-    """Обработчик HTTP запросов"""
-    
-    def do_GET(self):
-        """Обработка GET запросов"""
-        if self.path == "/":
-            self.path = "index.html"
-        try:
-            return http.server.SimpleHTTPRequestHandler.do_GET(self)
-        except FileNotFoundError:
-            self.send_error(404, "File not found")
-    
-    def do_POST(self):
-        """Обработка POST запросов (клонирование сайта)"""
-        content_length = int(self.headers.get('Content-Length', 0))
-        post_data = self.rfile.read(content_length).decode("utf-8")
-        
-        # Парсинг данных формы
-        form = parse_qs(post_data)
-        url = form.get("submitButton", [""])[0]
-        
-        if not url:
-            self.send_error(400, "Bad Request: URL is missing")
-            return
-        
-        # Запускаем клонирование в отдельном потоке
-        thread = threading.Thread(
-            target=self._clone_website_async,
-            args=(url,)
-        )
-        thread.daemon = True
-        thread.start()
-        
-        # Отправляем ответ пользователю
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
-        self.end_headers()
-        
-        response_html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Клонирование начато</title>
-            <style>
-                body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                .message { background: #e8f5e9; padding: 20px; border-radius: 10px; display: inline-block; }
-            </style>
-        </head>
-        <body>
-            <div class="message">
-                <h2>Клонирование начато!</h2>
-                <p>Сайт <strong>{}</strong> клонируется в фоновом режиме.</p>
-                <p>Проверьте логи для отслеживания прогресса.</p>
-                <p><a href="/">Вернуться на главную</a></p>
-            </div>
-        </body>
-        </html>
-        """.format(url)
-        
-        self.wfile.write(response_html.encode('utf-8'))
-    
-    def _clone_website_async(self, url):
-        """Асинхронное клонирование сайта"""
-        try:
-            # Нормализуем URL
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-            
-            # Создаем безопасное имя папки
-            parsed = urlparse(url)
-            site_name = parsed.netloc.replace('www.', '')
-            site_name = re.sub(r'[<>:"|?*]', '_', site_name)
-            
-            # Путь для сохранения
-            project_folder = Path(CLONED_SITES_DIR) / site_name
-            
-            logger.info("=" * 60)
-            logger.info(f"НАЧАЛО КЛОНИРОВАНИЯ: {url}")
-            logger.info(f"Папка сохранения: {project_folder.absolute()}")
-            logger.info("=" * 60)
-            
-            # Создаем клонировщик
-            cloner = WebsiteCloner(url, project_folder)
-            
-            # Клонируем сайт
-            cloner.clone()
-            
-            # Создаем ZIP архив
-            zip_filename = f"{site_name}.zip"
-            zip_path = Path(CLONED_SITES_DIR) / zip_filename
-            
-            create_zip_archive(project_folder, zip_path)
-            
-            # Отправляем через Telegram
-            send_telegram_file(
-                zip_path,
-                CONFIG.get('telegram_bot_token', ''),
-                CONFIG.get('telegram_chat_id', '')
-            )
-            
-            logger.info("=" * 60)
-            logger.info(f"КЛОНИРОВАНИЕ ЗАВЕРШЕНО: {url}")
-            logger.info(f"Архив: {zip_path.absolute()}")
-            logger.info("=" * 60)
-            
-        except Exception as e:
-            error_msg = f"Ошибка при клонировании: {e}"
-            logger.error(error_msg)
-            
-            # Можно отправить сообщение об ошибке в Telegram
-            if CONFIG.get('telegram_bot_token') and CONFIG.get('telegram_chat_id'):
-                try:
-                    send_url = f"https://api.telegram.org/bot{CONFIG['telegram_bot_token']}/sendMessage"
-                    requests.post(send_url, json={
-                        'chat_id': CONFIG['telegram_chat_id'],
-                        'text': f"❌ Ошибка клонирования {url}:\n{error_msg}"
-                    })
-                except:
-                    pass
-
-
-def main():
-    """Главная функция запуска сервера"""
-    # Создаем директорию для клонированных сайтов
-    os.makedirs(CLONED_SITES_DIR, exist_ok=True)
-    
-    # Устанавливаем рабочую директорию
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Проверяем конфигурацию Telegram
-    if not CONFIG.get('telegram_bot_token') or not CONFIG.get('telegram_chat_id'):
-        logger.warning("Telegram бот не настроен. Архивирование будет выполнено, но отправка пропущена.")
-        logger.warning("Настройте config.json для использования Telegram бота.")
-    
-    # Запускаем сервер
-    with socketserver.TCPServer(("127.0.0.1", PORT), RequestHandler) as s:
-        s.allow_reuse_address = True
-        logger.info(f"Сервер запущен на http://127.0.0.1:{PORT}")
-        logger.info(f"Откройте браузер и перейдите по адресу http://127.0.0.1:{PORT}")
-        s.serve_forever()
-
-
-if __name__ == "__main__":
-    main()
+"""
+Веб-сервер для клонирования сайтов с отправкой через Telegram бота.
+
+Основные возможности:
+- Полное клонирование сайта (HTML, CSS, JS, изображения, шрифты)
+- Сохранение структуры папок
+- Переписывание ссылок для локального просмотра
+- Архивирование в ZIP
+- Отправка архива через Telegram бота
+- Подробное логирование
+"""
+
+import http.server
+import socketserver
+import io
+import os
+import uuid
+import re
+import logging
+import zipfile
+import shutil
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse, urljoin, urlunparse, parse_qs
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+import threading
+import json
+
+# Настройка логирования
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('cloner.log', encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Константы
+CLONED_SITES_DIR = 'cloned_sites'
+CONFIG_FILE = 'config.json'
+PORT = 5000
+
+
+def _create_session():
+    """Создает общую сессию с пулом keep-alive соединений и повторами"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+
+    # Переиспользование соединений экономит TLS handshake на каждый запрос
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504]
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+
+# Одна сессия на весь процесс: клонирование и Telegram API
+# ходят через общий пул соединений
+SESSION = _create_session()
+
+# Пул фоновых задач клонирования: ограничивает число одновременных
+# клонов вместо потока на каждую отправку формы
+CLONE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cloner')
+
+# Активные задачи по URL: повторная отправка формы не плодит дубликаты
+ACTIVE_JOBS = {}
+_ACTIVE_JOBS_LOCK = threading.Lock()
+
+# Кешированный urlparse: одни и те же URL разбираются десятки раз
+# за проход по странице
+_urlparse_cached = lru_cache(maxsize=65536)(urlparse)
+
+
+@lru_cache(maxsize=65536)
+def _resolve_url_cached(url, base_url):
+    """
+    Преобразует относительный URL в абсолютный (с кешированием)
+
+    Args:
+        url: URL (может быть относительным)
+        base_url: Базовый URL
+
+    Returns:
+        Абсолютный URL
+    """
+    # Если URL уже абсолютный
+    if url.startswith(('http://', 'https://')):
+        return url
+
+    # Если URL начинается с //
+    if url.startswith('//'):
+        return f"{_urlparse_cached(base_url).scheme}:{url}"
+
+    # Объединяем с базовым URL
+    return urljoin(base_url, url)
+
+
+@lru_cache(maxsize=65536)
+def _url_to_local_path_cached(url, base_url):
+    """
+    Преобразует URL в локальный путь относительно корня сайта (с кешированием)
+
+    Args:
+        url: URL (может быть относительным)
+        base_url: Базовый URL текущей страницы
+
+    Returns:
+        Относительный путь для использования в HTML
+    """
+    absolute_url = _resolve_url_cached(url, base_url)
+    path = _urlparse_cached(absolute_url).path
+
+    # Если путь пустой, возвращаем index.html
+    if not path or path == '/':
+        return 'index.html'
+
+    # Удаляем начальный слэш
+    path = path.lstrip('/')
+
+    # Если нет расширения и это не директория, добавляем .html
+    if '.' not in os.path.basename(path) and not path.endswith('/'):
+        path += '.html'
+
+    return path
+
+def _strip_qf(url):
+    """
+    Отрезает query параметры и фрагмент без промежуточных списков
+
+    Args:
+        url: URL
+
+    Returns:
+        URL без '?...' и '#...'
+    """
+    q = url.find('?')
+    h = url.find('#')
+    if q == -1 and h == -1:
+        return url
+    if q == -1:
+        return url[:h]
+    if h == -1:
+        return url[:q]
+    return url[:min(q, h)]
+
+
+# Таблица замен недопустимых символов (str.translate быстрее re.sub)
+# и скомпилированный один раз паттерн url() для горячих циклов
+_UNSAFE_CHARS_TABLE = str.maketrans({c: '_' for c in '<>:"|?*'})
+_CSS_URL_RE = re.compile(r'url\(([^)]+)\)')
+
+
+# Загрузка конфигурации
+def load_config():
+    """Загружает конфигурацию из файла config.json"""
+    default_config = {
+        "telegram_bot_token": "",
+        "telegram_chat_id": ""
+    }
+    
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+                return {**default_config, **config}
+        except Exception as e:
+            logger.warning(f"Ошибка загрузки config.json: {e}. Используются значения по умолчанию.")
+    
+    return default_config
+
+CONFIG = load_config()
+
+
+class WebsiteCloner:
+    """Класс для клонирования веб-сайтов"""
+    
+    def __init__(self, url, output_dir):
+        """
+        Инициализация клонировщика
+        
+        Args:
+            url: URL сайта для клонирования
+            output_dir: Директория для сохранения файлов
+        """
+        self.url = self._normalize_url(url)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Парсинг URL
+        parsed = urlparse(self.url)
+        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
+        self.domain = parsed.netloc
+
+        # Префиксы абсолютных URL своего домена: проверка принадлежности
+        # в горячем цикле обходится без urlparse
+        self._domain_prefixes = (
+            'https://' + self.domain,
+            'http://' + self.domain,
+            '//' + self.domain
+        )
+        
+        # Общая сессия процесса: готовый пул соединений и повторы
+        self.session = SESSION
+        
+        # Отслеживание скачанных ресурсов
+        self.downloaded_urls = set()
+        self.failed_urls = []
+
+        # Результаты переписывания CSS по (хеш содержимого, базовый URL):
+        # один и тот же бандл, смонтированный по нескольким путям,
+        # обрабатывается один раз
+        self._css_cache = {}
+
+        # Валидаторы прошлого клонирования (ETag/Last-Modified по URL):
+        # при повторном клоне неизменившийся ресурс стоит один 304.
+        # Кеш лежит рядом с клоном, а не внутри: служебный файл
+        # не должен попадать в архив для получателя
+        self._etag_cache_path = self.output_dir.parent / (
+            self.output_dir.name + '.etag_cache.json'
+        )
+        self._etag_cache = self._load_etag_cache()
+
+        # Пул потоков для параллельной загрузки ресурсов
+        # (время клонирования ограничено сетью, а не CPU)
+        self.executor = ThreadPoolExecutor(max_workers=16)
+        self._lock = threading.Lock()
+
+
+        logger.info(f"Инициализация клонирования: {self.url}")
+        logger.info(f"Директория сохранения: {self.output_dir.absolute()}")
+    
+    def _load_etag_cache(self):
+        """Загружает кеш ETag/Last-Modified от прошлого клонирования"""
+        try:
+            with open(self._etag_cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_etag_cache(self):
+        """Сохраняет кеш ETag/Last-Modified для следующего клонирования"""
+        if not self._etag_cache:
+            return
+        try:
+            with open(self._etag_cache_path, 'w', encoding='utf-8') as f:
+                json.dump(self._etag_cache, f)
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кеш ETag: {e}")
+
+    def _normalize_url(self, url):
+        """Нормализует URL (добавляет протокол если отсутствует)"""
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        return url.rstrip('/')
+    
+    def _get_safe_filename(self, url_path):
+        """
+        Создает безопасное имя файла из URL пути
+        
+        Args:
+            url_path: Путь из URL
+            
+        Returns:
+            Безопасное имя файла
+        """
+        # Удаляем начальный слэш
+        path = url_path.lstrip('/')
+        
+        # Если путь пустой, возвращаем index.html
+        if not path or path == '/':
+            return 'index.html'
+        
+        # Заменяем недопустимые символы
+        path = path.translate(_UNSAFE_CHARS_TABLE)
+        
+        # Если путь заканчивается на /, добавляем index.html
+        if path.endswith('/'):
+            path += 'index.html'
+        
+        # Если нет расширения, добавляем .html
+        if '.' not in os.path.basename(path):
+            path += '.html'
+        
+        return path
+    
+    def _download_file(self, url, file_path):
+        """
+        Скачивает файл по URL
+        
+        Args:
+            url: URL файла
+            file_path: Путь для сохранения (может быть Path объектом или строкой)
+            
+        Returns:
+            True если успешно, False в противном случае
+        """
+        # Пропускаем если уже скачали
+        if url in self.downloaded_urls:
+            return True
+        
+        try:
+            # Преобразуем в Path если нужно
+            if isinstance(file_path, str):
+                file_path = Path(file_path)
+            
+            # Пути от вызывающего кода обычно уже безопасны: пересобираем
+            # Path только если недопустимые символы действительно есть
+            path_str = str(file_path)
+            if any(c in path_str for c in '<>:"|?*'):
+                file_path = Path(path_str.translate(_UNSAFE_CHARS_TABLE))
+            
+            # Создаем директорию если нужно
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Условный запрос: если ресурс не менялся с прошлого клона,
+            # сервер ответит 304 без тела
+            headers = None
+            cached = self._etag_cache.get(url)
+            if cached and file_path.exists():
+                headers = {}
+                if cached.get('etag'):
+                    headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    headers['If-Modified-Since'] = cached['last_modified']
+
+            # Скачиваем файл потоково: тело не буферизуется в памяти целиком
+            with self.session.get(url, timeout=30, allow_redirects=True,
+                                  stream=True, headers=headers) as response:
+                if response.status_code == 304:
+                    with self._lock:
+                        self.downloaded_urls.add(url)
+                    logger.info(f"  = Не изменился: {url}")
+                    return True
+
+                response.raise_for_status()
+
+                # Определяем тип контента
+                content_type = response.headers.get('Content-Type', '').lower()
+
+                # Сохраняем файл
+                if 'text' in content_type or 'html' in content_type or 'css' in content_type or 'javascript' in content_type:
+                    # Пишем байты как есть: response.text запускает
+                    # определение кодировки и двойную перекодировку.
+                    # Перекодируем только если сервер объявил не-UTF-8 charset.
+                    data = response.content
+                    charset = ''
+                    if 'charset=' in content_type:
+                        charset = content_type.split('charset=')[-1].split(';')[0].strip()
+                    if charset and charset not in ('utf-8', 'utf8', 'ascii'):
+                        data = data.decode(charset, errors='ignore').encode('utf-8')
+
+                    with open(file_path, 'wb') as f:
+                        f.write(data)
+                else:
+                    # Бинарные файлы пишем кусками по 64 КБ
+                    with open(file_path, 'wb', buffering=1 << 20) as f:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            f.write(chunk)
+
+                # Запоминаем валидаторы для следующего клонирования
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    with self._lock:
+                        self._etag_cache[url] = {
+                            'etag': etag,
+                            'last_modified': last_modified
+                        }
+
+            with self._lock:
+                self.downloaded_urls.add(url)
+            logger.info(f"  ✓ Скачан: {url} -> {file_path.relative_to(self.output_dir)}")
+            return True
+
+        except requests.exceptions.RequestException as e:
+            with self._lock:
+                self.failed_urls.append((url, str(e)))
+            logger.warning(f"  ✗ Ошибка скачивания {url}: {e}")
+            return False
+        except Exception as e:
+            with self._lock:
+                self.failed_urls.append((url, str(e)))
+            logger.error(f"  ✗ Неожиданная ошибка при скачивании {url}: {e}")
+            return False
+
+    def _download_many(self, jobs):
+        """
+        Параллельно скачивает несколько файлов через пул потоков
+
+        Args:
+            jobs: Список кортежей (URL, путь для сохранения)
+
+        Returns:
+            Список результатов в том же порядке
+        """
+        if not jobs:
+            return []
+
+        return list(self.executor.map(lambda job: self._download_file(*job), jobs))
+    
+    def _resolve_url(self, url, base_url=None):
+        """
+        Преобразует относительный URL в абсолютный
+
+        Args:
+            url: URL (может быть относительным)
+            base_url: Базовый URL (по умолчанию self.base_url)
+
+        Returns:
+            Абсолютный URL
+        """
+        return _resolve_url_cached(url, base_url if base_url is not None
+                                   else self.base_url)
+
+    def _is_same_domain(self, url):
+        """
+        Проверяет, принадлежит ли URL тому же домену
+
+        Очевидные случаи (относительный путь, явный префикс домена)
+        распознаются без urlparse.
+        """
+        if not url:
+            return False
+
+        # Относительный путь - заведомо тот же домен
+        if url[0] == '/' and not url.startswith('//'):
+            return True
+
+        # Явный префикс домена - тот же домен без парсинга
+        # (следующий символ проверяем, чтобы не принять e.com.evil.com за e.com)
+        for prefix in self._domain_prefixes:
+            if url.startswith(prefix):
+                rest = url[len(prefix):len(prefix) + 1]
+                if rest in ('', '/', '?', '#'):
+                    return True
+
+        # Общий случай - через кешированный urlparse
+        try:
+            parsed = _urlparse_cached(url)
+            return parsed.netloc == self.domain or parsed.netloc == ''
+        except:
+            return False
+    
+    def _should_download(self, url):
+        """
+        Определяет, нужно ли скачивать ресурс
+        
+        Args:
+            url: URL ресурса
+            
+        Returns:
+            True если нужно скачать, False в противном случае
+        """
+        # Пропускаем внешние домены (можно настроить)
+        if not self._is_same_domain(url):
+            return False
+        
+        # Пропускаем уже скачанные
+        if url in self.downloaded_urls:
+            return False
+        
+        # Пропускаем data: и javascript: URL
+        if url.startswith(('data:', 'javascript:', 'mailto:', 'tel:')):
+            return False
+        
+        return True
+    
+    def _process_html(self, soup, base_url):
+        """
+        Переписывает URL и собирает ресурсы за один обход дерева
+
+        Каждый find_all - полный проход по DOM; вместо восьми проходов
+        (четыре на переписывание и четыре на поиск ресурсов)
+        обрабатываем каждый тег один раз.
+
+        Args:
+            soup: Разобранное дерево BeautifulSoup
+            base_url: Базовый URL страницы
+
+        Returns:
+            Кортеж (HTML с переписанными URL, словарь URL -> путь файла)
+        """
+        pending = {}
+
+        def enqueue(url, default_suffix=None):
+            # Удаляем query параметры и фрагменты из URL
+            url = _strip_qf(url)
+            if url in pending or not self._should_download(url):
+                return
+            parsed = _urlparse_cached(url)
+            file_path = self.output_dir / parsed.path.lstrip('/')
+            if default_suffix and not file_path.suffix:
+                file_path = file_path.parent / (file_path.name + default_suffix)
+            pending[url] = file_path
+
+        # find_all(True) материализует список тегов до мутаций:
+        # замена tag.string ломает ленивый обход descendants
+        for tag in soup.find_all(True):
+            name = tag.name
+
+            if name in ('a', 'link'):
+                href = tag.get('href')
+                if href:
+                    absolute_url = self._resolve_url(href, base_url)
+                    if self._should_download(absolute_url):
+                        tag['href'] = self._url_to_local_path(href, base_url)
+                        # Скачиваем только таблицы стилей
+                        if name == 'link' and 'stylesheet' in tag.get('rel', []):
+                            enqueue(absolute_url, '.css')
+
+            elif name in ('img', 'script', 'iframe', 'source', 'audio', 'video'):
+                src = tag.get('src')
+                if src:
+                    absolute_url = self._resolve_url(src, base_url)
+                    if self._should_download(absolute_url):
+                        tag['src'] = self._url_to_local_path(src, base_url)
+                        if name != 'iframe':
+                            enqueue(absolute_url,
+                                    '.js' if name == 'script' else None)
+
+            elif name == 'style':
+                # CSS в style тегах
+                if tag.string:
+                    tag.string = self._rewrite_css_urls(tag.string, base_url)
+
+            # Атрибут style у любого тега; дешевая проверка подстроки
+            # отсекает подавляющее большинство стилей без url()
+            style_attr = tag.get('style')
+            if style_attr and 'url(' in style_attr:
+                tag['style'] = self._rewrite_css_urls(style_attr, base_url)
+
+        return str(soup), pending
+    
+    def _rewrite_css_urls(self, css_content, base_url):
+        """
+        Переписывает URL в CSS
+
+        Замыкание специализировано под конкретный base_url: все
+        зависимости подняты в локальные переменные, на каждый url()
+        не остается ни одного поиска атрибута через self.
+
+        Args:
+            css_content: Содержимое CSS
+            base_url: Базовый URL
+
+        Returns:
+            CSS с переписанными URL
+        """
+        if 'url(' not in css_content:
+            return css_content
+
+        resolve = _resolve_url_cached
+        to_local = _url_to_local_path_cached
+        should_download = self._should_download
+
+        def replace_url(match):
+            url = match.group(1).strip('\'"')
+            if should_download(resolve(url, base_url)):
+                return f"url({to_local(url, base_url)})"
+            return match.group(0)
+
+        return _CSS_URL_RE.sub(replace_url, css_content)
+    
+    def _url_to_local_path(self, url, base_url):
+        """
+        Преобразует URL в локальный путь относительно корня сайта
+        
+        Args:
+            url: URL (может быть относительным)
+            base_url: Базовый URL текущей страницы
+            
+        Returns:
+            Относительный путь для использования в HTML
+        """
+        return _url_to_local_path_cached(url, base_url)
+    
+    def clone(self):
+        """
+        Основной метод клонирования сайта
+        
+        Returns:
+            True если успешно, False в противном случае
+        """
+        try:
+            logger.info(f"Начало клонирования сайта: {self.url}")
+            
+            # Скачиваем главную страницу
+            logger.info("Скачивание главной страницы...")
+            response = self.session.get(self.url, timeout=30)
+            response.raise_for_status()
+            
+            # Определяем тип контента
+            content_type = response.headers.get('Content-Type', '').lower()
+            
+            if 'html' in content_type:
+                # Разбираем HTML один раз (lxml - C-парсер, в разы быстрее
+                # html.parser) и переиспользуем дерево для переписывания
+                # ссылок и поиска ресурсов
+                soup = BeautifulSoup(response.content, 'lxml')
+
+                # Переписываем URL и собираем ресурсы одним обходом
+                html_content, pending = self._process_html(soup, self.url)
+
+                # Сохраняем главную страницу
+                index_path = self.output_dir / 'index.html'
+                with open(index_path, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+
+                logger.info(f"Главная страница сохранена: {index_path}")
+
+                # Скачиваем все ресурсы параллельно
+                self._download_many(list(pending.items()))
+                
+            else:
+                # Если не HTML, просто сохраняем как есть
+                file_path = self.output_dir / 'index.html'
+                with open(file_path, 'wb') as f:
+                    f.write(response.content)
+                logger.info(f"Файл сохранен: {file_path}")
+            
+            # Скачиваем CSS файлы
+            self._download_css_files()
+            
+            # Скачиваем JS файлы
+            self._download_js_files()
+            
+            # Скачиваем изображения
+            self._download_images()
+            
+            # Скачиваем шрифты
+            self._download_fonts()
+
+            # Сохраняем валидаторы для инкрементального повторного клона
+            self._save_etag_cache()
+
+            logger.info(f"Клонирование завершено!")
+            logger.info(f"Скачано файлов: {len(self.downloaded_urls)}")
+            if self.failed_urls:
+                logger.warning(f"Не удалось скачать: {len(self.failed_urls)} файлов")
+            
+            return True
+            
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Ошибка при клонировании сайта: {e}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+        except Exception as e:
+            error_msg = f"Неожиданная ошибка: {e}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+        finally:
+            # Сервер живет долго: без shutdown потоки пула копились бы
+            # с каждым выполненным клонированием
+            self.executor.shutdown(wait=True)
+    
+    def _download_css_files(self):
+        """Скачивает CSS файлы и обрабатывает встроенные URL"""
+        # Находим все CSS файлы в структуре
+        for css_file in self.output_dir.rglob('*.css'):
+            try:
+                # Определяем базовый URL для этого CSS файла
+                relative_path = css_file.relative_to(self.output_dir)
+                if relative_path.parent == Path('.'):
+                    css_dir_url = f"{self.base_url}/"
+                else:
+                    css_dir_url = f"{self.base_url}/{relative_path.parent.as_posix().replace(chr(92), '/')}/"
+                
+                with open(css_file, 'r', encoding='utf-8', errors='ignore') as f:
+                    css_content = f.read()
+
+                # Дубликат уже обработанного CSS: берем готовый результат,
+                # его ресурсы уже скачаны при первой обработке
+                cache_key = (
+                    hashlib.blake2b(css_content.encode('utf-8', 'ignore'),
+                                    digest_size=16).digest(),
+                    css_dir_url
+                )
+                cached = self._css_cache.get(cache_key)
+                if cached is not None:
+                    if cached != css_content:
+                        with open(css_file, 'w', encoding='utf-8') as f:
+                            f.write(cached)
+                    continue
+
+                # Находим и скачиваем ресурсы из CSS перед переписыванием
+                # (повторные url() на один ресурс отсекаются словарем)
+                pending = {}
+                for match in _CSS_URL_RE.finditer(css_content):
+                    url = match.group(1).strip('\'"')
+                    absolute_url = self._resolve_url(url, css_dir_url)
+                    # Удаляем query параметры
+                    absolute_url = _strip_qf(absolute_url)
+                    if self._should_download(absolute_url):
+                        parsed = _urlparse_cached(absolute_url)
+                        # Сохраняем относительно директории CSS файла
+                        resource_relative = parsed.path.lstrip('/')
+                        if resource_relative and absolute_url not in pending:
+                            resource_path = css_file.parent / resource_relative
+                            pending[absolute_url] = resource_path
+
+                # Скачиваем ресурсы CSS параллельно
+                self._download_many(list(pending.items()))
+                
+                # Переписываем URL в CSS
+                css_content = self._rewrite_css_urls(css_content, css_dir_url)
+                self._css_cache[cache_key] = css_content
+
+                # Сохраняем обработанный CSS
+                with open(css_file, 'w', encoding='utf-8') as f:
+                    f.write(css_content)
+                    
+            except Exception as e:
+                logger.warning(f"Ошибка обработки CSS файла {css_file}: {e}")
+    
+    def _download_js_files(self):
+        """Скачивает JS файлы"""
+        js_dir = self.output_dir / 'js'
+        if not js_dir.exists():
+            return
+        
+        # JS файлы уже скачаны в _download_resources
+        pass
+    
+    def _download_images(self):
+        """Скачивает изображения"""
+        # Изображения уже скачаны в _download_resources
+        pass
+    
+    def _download_fonts(self):
+        """Скачивает шрифты из CSS"""
+        # Шрифты обрабатываются в _download_css_files
+        pass
+
+
+# Уже сжатые форматы: повторный DEFLATE тратит CPU без выигрыша в размере
+_STORED_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico',
+    '.woff', '.woff2', '.mp3', '.mp4', '.webm', '.zip', '.gz'
+})
+
+
+def _scandir_recursive(path):
+    """
+    Рекурсивно обходит директорию через os.scandir.
+
+    DirEntry уже несет результат stat, поэтому обход не делает
+    лишних системных вызовов в отличие от os.walk.
+
+    Args:
+        path: Корневая директория
+
+    Yields:
+        DirEntry для каждого файла
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scandir_recursive(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def create_zip_archive(source_dir, zip_path):
+    """
+    Создает ZIP архив из директории
+
+    Args:
+        source_dir: Исходная директория
+        zip_path: Путь к ZIP файлу
+
+    Returns:
+        Путь к созданному ZIP файлу
+    """
+    logger.info(f"Создание ZIP архива: {zip_path}")
+
+    # Системный zip сжимает вне GIL и работает заметно быстрее zipfile;
+    # при его отсутствии или ошибке остается встроенная реализация
+    if shutil.which('zip'):
+        try:
+            # zip дополняет существующий архив, а не пересоздает его:
+            # старый файл удаляем, иначе повторный клон оставит в архиве
+            # записи уже не существующих файлов
+            if os.path.exists(zip_path):
+                os.unlink(zip_path)
+            subprocess.run(
+                ['zip', '-r', '-q', '-1',
+                 '-n', ':'.join(sorted(_STORED_EXTENSIONS)),
+                 os.path.abspath(os.fspath(zip_path)), '.'],
+                cwd=os.fspath(source_dir),
+                check=True
+            )
+            zip_size = os.path.getsize(zip_path) / (1024 * 1024)  # MB
+            logger.info(f"ZIP архив создан: {zip_path} ({zip_size:.2f} MB)")
+            return zip_path
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"Системный zip не сработал ({e}), "
+                           f"используется zipfile")
+
+    # Имя в архиве получается срезом пути вместо os.path.relpath
+    prefix_len = len(os.fspath(source_dir).rstrip(os.sep)) + 1
+
+    # compresslevel=1: в разы меньше CPU при почти том же размере архива
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED,
+                         compresslevel=1) as zipf:
+        for entry in _scandir_recursive(source_dir):
+            arcname = entry.path[prefix_len:]
+            # Сжатые форматы кладем как есть
+            ext = os.path.splitext(entry.name)[1].lower()
+            compress_type = (zipfile.ZIP_STORED
+                             if ext in _STORED_EXTENSIONS
+                             else zipfile.ZIP_DEFLATED)
+            zipf.write(entry.path, arcname, compress_type=compress_type)
+            logger.debug(f"  Добавлен в архив: {arcname}")
+    
+    zip_size = os.path.getsize(zip_path) / (1024 * 1024)  # MB
+    logger.info(f"ZIP архив создан: {zip_path} ({zip_size:.2f} MB)")
+    
+    return zip_path
+
+
+class _MultipartUpload:
+    """
+    Потоковое multipart/form-data тело с известной длиной.
+
+    requests с files= собирает все тело в памяти; здесь файл читается
+    с диска кусками по 1 МБ, а атрибут len позволяет requests выставить
+    Content-Length без буферизации архива целиком.
+    """
+
+    def __init__(self, fields, file_field, file_path,
+                 content_type='application/zip'):
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+
+        head = io.BytesIO()
+        for name, value in fields.items():
+            head.write(
+                f'--{boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'.encode('utf-8')
+            )
+        filename = os.path.basename(file_path)
+        head.write(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; '
+            f'filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8')
+        )
+        tail = io.BytesIO(f'\r\n--{boundary}--\r\n'.encode('utf-8'))
+
+        self.len = (head.tell() + os.path.getsize(file_path)
+                    + len(tail.getvalue()))
+        head.seek(0)
+        self._streams = [head, open(file_path, 'rb'), tail]
+
+    def read(self, size=-1):
+        """Читает очередной кусок тела (не больше 1 МБ за вызов)"""
+        if size is None or size < 0:
+            size = 1 << 20
+        while self._streams:
+            chunk = self._streams[0].read(size)
+            if chunk:
+                return chunk
+            self._streams.pop(0).close()
+        return b''
+
+
+def send_telegram_file(file_path, bot_token, chat_id):
+    """
+    Отправляет файл через Telegram бота
+
+    Args:
+        file_path: Путь к файлу
+        bot_token: Токен Telegram бота
+        chat_id: ID чата для отправки
+
+    Returns:
+        True если успешно, False в противном случае
+    """
+    if not bot_token or not chat_id:
+        logger.warning("Telegram бот не настроен. Пропуск отправки.")
+        return False
+
+    try:
+        logger.info(f"Отправка файла через Telegram: {file_path}")
+
+        url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
+
+        # Потоковая загрузка: память не зависит от размера архива
+        body = _MultipartUpload({'chat_id': chat_id}, 'document', file_path)
+        response = SESSION.post(
+            url,
+            data=body,
+            headers={'Content-Type': body.content_type},
+            timeout=(10, 600)
+        )
+        response.raise_for_status()
+
+        logger.info("Файл успешно отправлен через Telegram")
+        return True
+
+    except Exception as e:
+        logger.error(f"Ошибка отправки файла через Telegram: {e}")
+        return False
+
+
+class RequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Обработчик HTTP запросов"""
+    
+    def do_GET(self):
+        """Обработка GET запросов"""
+        if self.path == "/":
+            self.path = "index.html"
+        try:
+            return http.server.SimpleHTTPRequestHandler.do_GET(self)
+        except FileNotFoundError:
+            self.send_error(404, "File not found")
+    
+    def do_POST(self):
+        """Обработка POST запросов (клонирование сайта)"""
+        content_length = int(self.headers.get('Content-Length', 0))
+        post_data = self.rfile.read(content_length).decode("utf-8")
+        
+        # Парсинг данных формы
+        form = parse_qs(post_data)
+        url = form.get("submitButton", [""])[0]
+        
+        if not url:
+            self.send_error(400, "Bad Request: URL is missing")
+            return
+        
+        # Запускаем клонирование в общем пуле; тот же URL,
+        # отправленный повторно, не запускает вторую задачу
+        with _ACTIVE_JOBS_LOCK:
+            job = ACTIVE_JOBS.get(url)
+            if job is None or job.done():
+                ACTIVE_JOBS[url] = CLONE_POOL.submit(
+                    self._clone_website_async, url
+                )
+        
+        # Отправляем ответ пользователю
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.end_headers()
+        
+        response_html = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>Клонирование начато</title>
+            <style>
+                body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
+                .message { background: #e8f5e9; padding: 20px; border-radius: 10px; display: inline-block; }
+            </style>
+        </head>
+        <body>
+            <div class="message">
+                <h2>Клонирование начато!</h2>
+                <p>Сайт <strong>{}</strong> клонируется в фоновом режиме.</p>
+                <p>Проверьте логи для отслеживания прогресса.</p>
+                <p><a href="/">Вернуться на главную</a></p>
+            </div>
+        </body>
+        </html>
+        """.format(url)
+        
+        self.wfile.write(response_html.encode('utf-8'))
+    
+    def _clone_website_async(self, url):
+        """Асинхронное клонирование сайта"""
+        try:
+            # Нормализуем URL
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            
+            # Создаем безопасное имя папки
+            parsed = urlparse(url)
+            site_name = parsed.netloc.replace('www.', '')
+            site_name = site_name.translate(_UNSAFE_CHARS_TABLE)
+            
+            # Путь для сохранения
+            project_folder = Path(CLONED_SITES_DIR) / site_name
+            
+            logger.info("=" * 60)
+            logger.info(f"НАЧАЛО КЛОНИРОВАНИЯ: {url}")
+            logger.info(f"Папка сохранения: {project_folder.absolute()}")
+            logger.info("=" * 60)
+            
+            # Создаем клонировщик
+            cloner = WebsiteCloner(url, project_folder)
+            
+            # Клонируем сайт
+            cloner.clone()
+            
+            # Создаем ZIP архив
+            zip_filename = f"{site_name}.zip"
+            zip_path = Path(CLONED_SITES_DIR) / zip_filename
+            
+            create_zip_archive(project_folder, zip_path)
+            
+            # Отправляем через Telegram
+            send_telegram_file(
+                zip_path,
+                CONFIG.get('telegram_bot_token', ''),
+                CONFIG.get('telegram_chat_id', '')
+            )
+            
+            logger.info("=" * 60)
+            logger.info(f"КЛОНИРОВАНИЕ ЗАВЕРШЕНО: {url}")
+            logger.info(f"Архив: {zip_path.absolute()}")
+            logger.info("=" * 60)
+            
+        except Exception as e:
+            error_msg = f"Ошибка при клонировании: {e}"
+            logger.error(error_msg)
+            
+            # Можно отправить сообщение об ошибке в Telegram
+            if CONFIG.get('telegram_bot_token') and CONFIG.get('telegram_chat_id'):
+                try:
+                    send_url = f"https://api.telegram.org/bot{CONFIG['telegram_bot_token']}/sendMessage"
+                    SESSION.post(send_url, json={
+                        'chat_id': CONFIG['telegram_chat_id'],
+                        'text': f"❌ Ошибка клонирования {url}:\n{error_msg}"
+                    })
+                except:
+                    pass
+
+
+def main():
+    """Главная функция запуска сервера"""
+    # Создаем директорию для клонированных сайтов
+    os.makedirs(CLONED_SITES_DIR, exist_ok=True)
+    
+    # Устанавливаем рабочую директорию
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    
+    # Проверяем конфигурацию Telegram
+    if not CONFIG.get('telegram_bot_token') or not CONFIG.get('telegram_chat_id'):
+        logger.warning("Telegram бот не настроен. Архивирование будет выполнено, но отправка пропущена.")
+        logger.warning("Настройте config.json для использования Telegram бота.")
+    
+    # Запускаем сервер
+    with socketserver.TCPServer(("127.0.0.1", PORT), RequestHandler) as s:
+        s.allow_reuse_address = True
+        logger.info(f"Сервер запущен на http://127.0.0.1:{PORT}")
+        logger.info(f"Откройте браузер и перейдите по адресу http://127.0.0.1:{PORT}")
+        s.serve_forever()
+
+
+if __name__ == "__main__":
+    main()